@@ -1,7 +1,16 @@
 """Agent loop — the heart of Amas Code."""
+import atexit
+import codecs
+import datetime
+import io
 import json
 import re
+import threading
 import time
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 from prompt_toolkit import PromptSession
@@ -9,12 +18,17 @@ from prompt_toolkit.completion import Completer, Completion
 from prompt_toolkit.history import FileHistory
 from prompt_toolkit.formatted_text import HTML
 
-from amas_code import checkpoint, config as config_mod, providers, skills, tools, ui
+from amas_code import checkpoint, config as config_mod, file_index, history, providers, skills, tools, ui
 from amas_code.history import (
     ChatSession, list_sessions, show_chat_list, show_chat_detail,
     show_chat_checkpoints, delete_session, search_sessions,
 )
 
+try:
+    import orjson  # Optional speedup: pip install amas-code[speed]
+except ImportError:
+    orjson = None
+
 BASE_SYSTEM_PROMPT = """You are Amas Code, an elite AI coding assistant and principal software engineer running in the user's terminal. Your singular goal is to deliver high-quality, fully functional, maintainable, and architecturally sound solutions. You execute tasks autonomously and thoroughly.
 
 # Core Mandates
@@ -116,16 +130,23 @@ COMMANDS = {
     "/quit": "Exit Amas Code",
 }
 
+# Sorted for prefix lookup with bisect
+_COMMANDS_SORTED = tuple(sorted(COMMANDS.items()))
+_COMMAND_NAMES = tuple(cmd for cmd, _ in _COMMANDS_SORTED)
+
 # Model sub-completions
-_MODEL_COMPLETIONS = {f"/model {m}": "Switch to this model" for m in config_mod.KNOWN_MODELS}
+# (lowercased name, name) pairs so filtering doesn't slice or lowercase per keystroke
+_MODEL_ITEMS = tuple((m.lower(), m) for m in config_mod.KNOWN_MODELS)
+
+# /model picker labels include the provider so the list is searchable by type
+_MODEL_PICKER_BASE = tuple((f"[{config_mod.provider_of(m)}] {m}", m) for m in config_mod.KNOWN_MODELS)
 
 MAX_TOOL_ITERATIONS = 25  # Soft warning threshold
 
+_PROMPT_LIMIT = 8000  # System prompt char budget (~2000 tokens)
+_BASE_LEN = len(BASE_SYSTEM_PROMPT)
 
-# ── File cache for @ completions ──────────────────────────────────────────────
-_FILE_CACHE: list[tuple[str, str]] = []
-_FILE_CACHE_TS: float = 0.0
-_FILE_CACHE_TTL = 5.0  # Refresh every 5 seconds
+_AT_RE = re.compile(r"@([^\s,;:)(!\?\"']+)")  # @path references in user input
 
 
 class InputCompleter(Completer):
@@ -135,6 +156,11 @@ class InputCompleter(Completer):
         self._ignore = set(config.get("ignore", [
             "node_modules", "__pycache__", ".git", "*.pyc", "dist", "build", ".venv", ".amas",
         ]))
+        self._anchor: tuple[int, str] | None = None  # @ being completed; index refreshed once per @
+
+    def reset(self) -> None:
+        """Forget the current @ anchor so the next @ refreshes the file index."""
+        self._anchor = None
 
     def get_completions(self, document, complete_event):
         text = document.text_before_cursor
@@ -144,7 +170,7 @@ class InputCompleter(Completer):
         if at_idx >= 0:
             partial = text[at_idx + 1:]
             if " " not in partial:  # Only complete until next space
-                for relpath, size in self._file_completions(partial):
+                for relpath, size in self._file_completions(partial, (at_idx, text[:at_idx])):
                     yield Completion(
                         relpath,
                         start_position=-len(partial),
@@ -160,24 +186,29 @@ class InputCompleter(Completer):
 
         if stripped.startswith("/model "):
             sub = stripped[len("/model "):]
-            for cmd, desc in _MODEL_COMPLETIONS.items():
-                model_name = cmd[len("/model "):]
-                if model_name.lower().startswith(sub.lower()):
-                    yield Completion(model_name, start_position=-len(sub), display=model_name, display_meta=desc)
+            sub_lower, start = sub.lower(), -len(sub)
+            for model_lower, model_name in _MODEL_ITEMS:
+                if model_lower.startswith(sub_lower):
+                    yield Completion(model_name, start_position=start, display=model_name, display_meta="Switch to this model")
             return
 
-        for cmd, desc in COMMANDS.items():
-            if cmd.startswith(stripped.lower()):
-                yield Completion(cmd, start_position=-len(stripped), display=cmd, display_meta=desc)
+        prefix = stripped.lower()
+        i = bisect_left(_COMMAND_NAMES, prefix)
+        while i < len(_COMMAND_NAMES) and _COMMAND_NAMES[i].startswith(prefix):
+            cmd, desc = _COMMANDS_SORTED[i]
+            yield Completion(cmd, start_position=-len(stripped), display=cmd, display_meta=desc)
+            i += 1
+
+    def _file_completions(self, partial: str, anchor: tuple[int, str]) -> list[tuple[str, str]]:
+        """Return (relpath, size) pairs matching the partial path.
 
-    def _file_completions(self, partial: str) -> list[tuple[str, str]]:
-        """Return (relpath, size) pairs matching the partial path."""
-        global _FILE_CACHE, _FILE_CACHE_TS
-        if time.time() - _FILE_CACHE_TS > _FILE_CACHE_TTL:
-            _FILE_CACHE = _scan_project_files(Path("."), self._ignore)
-            _FILE_CACHE_TS = time.time()
-        partial_lower = partial.lower()
-        return [(p, s) for p, s in _FILE_CACHE if partial_lower in p.lower()]
+        The index is only re-statted when a new @ is started, not on every keystroke;
+        the agent's own file writes keep it current via file_index.touch().
+        """
+        if anchor != self._anchor:
+            file_index.refresh(self._ignore)
+            self._anchor = anchor
+        return file_index.search(partial)
 
 
 class Agent:
@@ -186,6 +217,10 @@ class Agent:
     def __init__(self, cfg: dict | None = None):
         self.config = cfg or config_mod.load()
         self.messages: list[dict] = []
+        self._ctx_chars = 0  # Running total of message content length
+        self._role_counts: Counter[str] = Counter()  # Running message count per role
+        self._api_key_cache: dict[str, str | None] = {}  # model → resolved key
+        self._sys_fp: int | None = None  # Fingerprint of the inputs behind the current system prompt
         self.actions: list[dict] = []
         self.project_context: str = ""  # From /init
         self._rules: str = ""
@@ -203,10 +238,17 @@ class Agent:
 
     def _apply_api_key(self) -> None:
         """Resolve and apply API key to config for the current model."""
-        key = config_mod.resolve_api_key(self.config)
+        key = self._resolve_api_key()
         if key:
             self.config["api_key"] = key
 
+    def _resolve_api_key(self) -> str | None:
+        """API key for the current model, cached per model until /key changes keys."""
+        model = self.config.get("model", "")
+        if model not in self._api_key_cache:
+            self._api_key_cache[model] = config_mod.resolve_api_key(self.config)
+        return self._api_key_cache[model]
+
     def _load_intelligence(self) -> None:
         """Load rules, skills, and lessons from .amas/ directory."""
         self._rules = skills.load_rules()
@@ -240,43 +282,80 @@ class Agent:
 
     def _rebuild_system_prompt(self, extra_context: str = "") -> None:
         """Build system prompt from base + project context + rules + skills."""
-        import datetime
-        parts = [BASE_SYSTEM_PROMPT]
+        # Skip the rebuild when nothing that feeds the prompt changed
+        fp = hash((
+            self.project_context, self._rules, tuple(self._skills.items()), tuple(self._lessons.items()),
+            extra_context, self.config.get("auto_accept", False), self.config.get("model", "unknown"),
+            _today_str(),
+        ))
+        if fp == self._sys_fp and self.messages and self.messages[0].get("role") == "system":
+            return
+        self._sys_fp = fp
+
+        buf = io.StringIO()
+        buf.write(BASE_SYSTEM_PROMPT)
+        size = _BASE_LEN
+        # Sections are built lazily and skipped once the prompt is already past the limit
+        for section in self._prompt_sections(extra_context):
+            if size > _PROMPT_LIMIT:
+                break
+            buf.write("\n")
+            buf.write(section)
+            size += 1 + len(section)
+        system_prompt = buf.getvalue()
+
+        # Trim if too long (~2000 tokens ≈ 8000 chars)
+        if size > _PROMPT_LIMIT:
+            system_prompt = system_prompt[:_PROMPT_LIMIT] + "\n\n[system prompt trimmed for context]"
+
+        # Update or set system message
+        if self.messages and self.messages[0].get("role") == "system":
+            self._ctx_chars -= _msg_chars(self.messages[0])
+            self.messages[0] = {"role": "system", "content": system_prompt}
+            self._ctx_chars += len(system_prompt)
+        else:
+            self._add_msg({"role": "system", "content": system_prompt}, index=0)
+
+    # ── Message bookkeeping ──────────────────────────────────────────────────
 
+    def _add_msg(self, msg: dict, index: int | None = None) -> None:
+        """Append (or insert at `index`) a message, keeping the context counters in sync."""
+        if index is None:
+            self.messages.append(msg)
+        else:
+            self.messages.insert(index, msg)
+        self._ctx_chars += _msg_chars(msg)
+        self._role_counts[msg.get("role")] += 1
+
+    def _reset_msgs(self, messages: list[dict] | None = None) -> None:
+        """Replace the whole conversation and recount the context counters."""
+        self.messages = messages or []
+        self._ctx_chars = sum(_msg_chars(m) for m in self.messages)
+        self._role_counts = Counter(m.get("role") for m in self.messages)
+
+    def _prompt_sections(self, extra_context: str):
+        """Yield the optional system prompt sections in order."""
         # Current state
         model = self.config.get("model", "unknown")
-        date_str = datetime.datetime.now().strftime("%A, %B %d, %Y")
-        parts.append(f"\n## Current Session\n- Date: {date_str}\n- Model: {model}\n- Auto-accept: {self.config.get('auto_accept', False)}")
+        yield f"\n## Current Session\n- Date: {_today_str()}\n- Model: {model}\n- Auto-accept: {self.config.get('auto_accept', False)}"
 
         if self.project_context:
-            parts.append(f"\n## Project Context\n{self.project_context}")
+            yield f"\n## Project Context\n{self.project_context}"
 
         if self._rules:
-            parts.append(f"\n## Project Rules\n{self._rules}")
+            yield f"\n## Project Rules\n{self._rules}"
 
         if self._skills:
             # Include all skills (they're explicitly loaded by the user)
             skill_text = "\n\n".join(f"### {name}\n{content}" for name, content in self._skills.items())
-            parts.append(f"\n## Active Skills\n{skill_text}")
+            yield f"\n## Active Skills\n{skill_text}"
 
         if self._lessons:
             lesson_text = "\n\n".join(f"### Lesson Learned: {name}\n{content}" for name, content in self._lessons.items())
-            parts.append(f"\n## Lessons from Past Turns\n{lesson_text}")
+            yield f"\n## Lessons from Past Turns\n{lesson_text}"
 
         if extra_context:
-            parts.append(f"\n## Additional Context\n{extra_context}")
-
-        system_prompt = "\n".join(parts)
-
-        # Trim if too long (~2000 tokens ≈ 8000 chars)
-        if len(system_prompt) > 8000:
-            system_prompt = system_prompt[:8000] + "\n\n[system prompt trimmed for context]"
-
-        # Update or set system message
-        if self.messages and self.messages[0].get("role") == "system":
-            self.messages[0] = {"role": "system", "content": system_prompt}
-        else:
-            self.messages.insert(0, {"role": "system", "content": system_prompt})
+            yield f"\n## Additional Context\n{extra_context}"
 
     def _make_session(self) -> PromptSession:
         """Create prompt session with history and styled autocomplete dropdown."""
@@ -298,6 +377,7 @@ class Agent:
         """Get user input with autocomplete. Returns None on empty input, raises SystemExit on EOF."""
         if self.session is None:
             self.session = self._make_session()
+        self.session.completer.reset()
         try:
             text = self.session.prompt(self._get_prompt()).strip()
             return text if text else None
@@ -331,21 +411,21 @@ class Agent:
                 from amas_code import web
                 web.close_browser()
                 self._save_chat_session()
+                history.flush()
                 ui.info("Goodbye! 👋")
                 return True
             case "/clear":
                 self._save_chat_session()
-                self.messages = []
+                self._reset_msgs()
                 self._rebuild_system_prompt()
                 self.chat_session = ChatSession()
                 self.chat_session.model = self.config.get("model", "unknown")
                 # Clear terminal and re-show startup
-                import os
-                os.system("clear" if os.name != "nt" else "cls")
+                ui.clear_screen()
                 ui.show_welcome()
                 model = self.config["model"]
-                provider = model.split("/")[0] if "/" in model else "auto"
-                has_key = bool(config_mod.resolve_api_key(self.config))
+                provider = _display_provider(model)
+                has_key = bool(self._resolve_api_key())
                 ui.show_model_info(model, provider, has_key)
             case "/init":
                 self._handle_init()
@@ -421,38 +501,62 @@ class Agent:
     def _handle_compact(self) -> None:
         """Summarize conversation to reduce context size."""
         # Count non-system messages
-        convo_msgs = [m for m in self.messages if m.get("role") != "system"]
-        if len(convo_msgs) < 4:
+        convo_count = len(self.messages) - self._role_counts["system"]
+        if convo_count < 4:
             ui.warning("Conversation too short to compact.")
             return
 
-        ui.info(f"Compacting {len(convo_msgs)} messages...")
+        ui.info(f"Compacting {convo_count} messages...")
 
         # Build summary request
-        summary_prompt = (
+        buf = [
             "Summarize this conversation concisely, preserving:\n"
             "- Key decisions made\n"
             "- Files created, edited, or deleted\n"
             "- Important context and user preferences\n"
             "- Current state of the task\n\n"
             "Conversation:\n"
-        )
-        for msg in convo_msgs:
+        ]
+        for msg in self.messages:
             role = msg.get("role", "?")
-            content = msg.get("content", "")
-            if role == "tool":
-                content = content[:200] + "..." if len(content) > 200 else content
-            summary_prompt += f"\n[{role}]: {content[:500]}"
-
-        # Call LLM to summarize
-        summary_response = providers.complete(
-            messages=[
-                {"role": "system", "content": "You are a concise summarizer. Provide a clear summary."},
-                {"role": "user", "content": summary_prompt},
-            ],
-            tools=None,
-            config=self.config,
-        )
+            if role == "system":
+                continue
+            content = msg.get("content") or ""
+            if role == "tool" and len(content) > 200:
+                content = content[:200] + "..."
+            elif len(content) > 500:
+                content = content[:500]
+            buf.append(f"\n[{role}]: {content}")
+        summary_prompt = "".join(buf)
+
+        # Call LLM to summarize on a daemon thread so the spinner keeps animating and
+        # Ctrl+C can abandon the wait (an abandoned call never holds up interpreter exit)
+        result: dict = {}
+
+        def _summarize() -> None:
+            try:
+                result["response"] = providers.complete(
+                    messages=[
+                        {"role": "system", "content": "You are a concise summarizer. Provide a clear summary."},
+                        {"role": "user", "content": summary_prompt},
+                    ],
+                    tools=None,
+                    config=self.config,
+                )
+            except Exception as e:
+                result["error"] = e
+
+        worker = threading.Thread(target=_summarize, daemon=True)
+        worker.start()
+        try:
+            with ui.StreamingDisplay():
+                worker.join()
+        except KeyboardInterrupt:
+            ui.warning("Compaction cancelled — conversation left unchanged.")
+            return
+        if "error" in result:
+            raise result["error"]
+        summary_response = result["response"]
 
         summary = summary_response.get("content", "")
         if not summary:
@@ -460,9 +564,9 @@ class Agent:
             return
 
         # Replace conversation with summary
-        self.messages = []
+        self._reset_msgs()
         self._rebuild_system_prompt(extra_context=f"Previous conversation summary:\n{summary}")
-        ui.success(f"Compacted {len(convo_msgs)} messages into summary.")
+        ui.success(f"Compacted {convo_count} messages into summary.")
         ui.console.print(f"\n[dim]{summary[:300]}{'...' if len(summary) > 300 else ''}[/]\n")
 
     def _handle_model_command(self, args: list[str]) -> None:
@@ -470,19 +574,14 @@ class Agent:
         # Default to interactive picker if no arguments or /model list
         if not args or args[0] == "list":
             current = self.config["model"]
-            items = []
-            for m in config_mod.KNOWN_MODELS:
-                # Group by provider for "searchable by type"
-                provider = m.split("/")[0] if "/" in m else config_mod._guess_provider(m)
-                marker = " ◀ current" if m == current else ""
-                # Use a label that includes the type (provider) for easy searching
-                label = f"[{provider}] {m}{marker}"
-                items.append({"label": label, "model": m})
+            items = [
+                {"label": f"{label} ◀ current" if m == current else label, "model": m}
+                for label, m in _MODEL_PICKER_BASE
+            ]
 
             selected = ui.interactive_picker(items, title="🤖 Switch Model")
             if selected:
-                import os
-                os.system("clear" if os.name != "nt" else "cls")
+                ui.clear_screen()
                 
                 self.config["model"] = selected["model"]
                 config_mod.save(self.config)
@@ -491,8 +590,8 @@ class Agent:
                 # Refresh UI
                 ui.show_welcome()
                 model = self.config["model"]
-                provider = model.split("/")[0] if "/" in model else "auto"
-                has_key = bool(config_mod.resolve_api_key(self.config))
+                provider = _display_provider(model)
+                has_key = bool(self._resolve_api_key())
                 ui.show_model_info(model, provider, has_key)
                 
                 ui.success(f"Model switched to: [cyan]{selected['model']}[/]")
@@ -515,6 +614,7 @@ class Agent:
         if len(args) >= 2:
             provider, key = args[0].lower(), args[1]
             config_mod.set_api_key(provider, key)
+            self._api_key_cache.clear()
             self._apply_api_key()
             ui.show_config_saved(f"api_keys.{provider}", f"{key[:8]}...{'*' * 8}")
             return
@@ -523,6 +623,7 @@ class Agent:
             key = ui.prompt_input(f"Enter API key for {provider}", password=True)
             if key:
                 config_mod.set_api_key(provider, key)
+                self._api_key_cache.clear()
                 self._apply_api_key()
                 ui.show_config_saved(f"api_keys.{provider}", f"{key[:8]}...{'*' * 8}")
             return
@@ -531,8 +632,8 @@ class Agent:
     def _show_config(self) -> None:
         """Display current config."""
         model = self.config["model"]
-        provider = model.split("/")[0] if "/" in model else "auto"
-        has_key = bool(config_mod.resolve_api_key(self.config))
+        provider = _display_provider(model)
+        has_key = bool(self._resolve_api_key())
         ui.show_model_info(model, provider, has_key)
         auto = "[green]ON[/]" if self.config.get("auto_accept") else "[red]OFF[/]"
         ui.info(f"Auto-accept: {auto}")
@@ -569,8 +670,8 @@ class Agent:
     def _show_cost(self) -> None:
         """Show context size information."""
         msg_count = len(self.messages)
-        tool_msgs = sum(1 for m in self.messages if m.get("role") == "tool")
-        total_chars = sum(len(m.get("content", "")) for m in self.messages)
+        tool_msgs = self._role_counts["tool"]
+        total_chars = self._ctx_chars
         est_tokens = total_chars // 4  # Rough estimate
         ui.info(f"Messages: [cyan]{msg_count}[/] (tool results: [cyan]{tool_msgs}[/])")
         ui.info(f"Context size: ~[cyan]{est_tokens:,}[/] tokens ({total_chars:,} chars)")
@@ -588,12 +689,23 @@ class Agent:
         if not p.exists():
             ui.error(f"File not found: {path}")
             return
+        limit = self.config.get("max_attach_bytes", 1_000_000)
         try:
-            content = p.read_text(encoding="utf-8")
+            # Bounded read: never hold more than `limit` bytes of a huge log in memory
+            with open(p, "rb") as f:
+                raw = f.read(limit + 1)
+            truncated = len(raw) > limit
+            if truncated:
+                raw = raw[:limit]
+            # Incremental decoder tolerates a multi-byte char cut at the limit
+            content = codecs.getincrementaldecoder("utf-8")().decode(raw, final=not truncated)
         except UnicodeDecodeError:
             ui.error(f"Cannot read binary file: {path}")
             return
-        self.messages.append({
+        if truncated:
+            ui.warning(f"{path} is larger than {limit:,} bytes — attaching only the first {limit:,}.")
+            content += "\n[... truncated]"
+        self._add_msg({
             "role": "user",
             "content": f"File attached: `{path}`\n```\n{content}\n```",
         })
@@ -601,25 +713,25 @@ class Agent:
 
     def _expand_at_refs(self, text: str) -> str:
         """Expand @filepath references: prepend file contents and replace @path with `path`."""
-        refs = list(re.finditer(r"@([^\s,;:)(!\?\"']+)", text))
+        refs = list(_AT_RE.finditer(text))
         if not refs:
             return text
+        # Read all referenced files concurrently, then report in input order
+        with ThreadPoolExecutor(max_workers=min(8, len(refs))) as ex:
+            results = list(ex.map(_safe_read, (m.group(1) for m in refs)))
         attachments = []
-        for m in refs:
+        for m, (content, err) in zip(refs, results):
             path = m.group(1)
-            p = Path(path)
-            if p.exists() and p.is_file():
-                try:
-                    content = p.read_text(encoding="utf-8")
-                    attachments.append(f"File `{path}`:\n```\n{content}\n```")
-                    text = text.replace(m.group(0), f"`{path}`", 1)
-                    ui.success(f"Attached [cyan]{path}[/] ({len(content):,} chars)")
-                except UnicodeDecodeError:
-                    ui.warning(f"Cannot read binary file: {path}")
-                except Exception as e:
-                    ui.warning(f"Could not read {path}: {e}")
-            else:
+            if content is not None:
+                attachments.append(f"File `{path}`:\n```\n{content}\n```")
+                text = text.replace(m.group(0), f"`{path}`", 1)
+                ui.success(f"Attached [cyan]{path}[/] ({len(content):,} chars)")
+            elif err == "missing":
                 ui.warning(f"@{path}: file not found")
+            elif err == "binary":
+                ui.warning(f"Cannot read binary file: {path}")
+            else:
+                ui.warning(f"Could not read {path}: {err}")
         if attachments:
             return "\n\n".join(attachments) + "\n\n" + text
         return text
@@ -677,18 +789,14 @@ class Agent:
             # Find checkpoints for this prompt: message_index > u_idx AND message_index <= next_u_idx
             cps = [cp for cp in self.chat_session.checkpoints if u_idx < cp.get("message_index", 0) <= next_u_idx]
             
-            # Summary of changes for this prompt
+            # Summary of changes for this prompt (numstat only — the full diff for the
+            # selected point is fetched once below via get_diff_between)
             total_added = 0
             total_removed = 0
-            combined_diff = ""
             for cp in cps:
-                try:
-                    d = checkpoint.get_diff(cp["hash"])
-                    combined_diff += d + "\n"
-                    total_added += sum(1 for line in d.splitlines() if line.startswith("+") and not line.startswith("+++"))
-                    total_removed += sum(1 for line in d.splitlines() if line.startswith("-") and not line.startswith("---"))
-                except Exception:
-                    pass
+                added, removed = checkpoint.get_diff_stats(cp["hash"])
+                total_added += added
+                total_removed += removed
             
             diff_summary = f" [green]+{total_added}[/] [red]-{total_removed}[/]" if total_added or total_removed else ""
             
@@ -705,7 +813,6 @@ class Agent:
             items.append({
                 "label": f"{label}{diff_summary}",
                 "target_cp": target_cp,
-                "diff": combined_diff,
                 "message_index": u_idx,
             })
 
@@ -721,15 +828,7 @@ class Agent:
         
         # If no target_cp, try to find the very first checkpoint's parent (beginning of time)
         if not target_hash and self.chat_session.checkpoints:
-            try:
-                from git import Repo
-                repo = Repo(".", search_parent_directories=True)
-                first_cp = self.chat_session.checkpoints[0]
-                commit = repo.commit(first_cp["hash"])
-                if commit.parents:
-                    target_hash = commit.parents[0].hexsha
-            except Exception:
-                pass
+            target_hash = checkpoint.parent_of(self.chat_session.checkpoints[0]["hash"])
 
         # Show combined changes that will be undone
         if target_hash:
@@ -762,7 +861,7 @@ class Agent:
         if mode_choice["mode"] == "chat_and_code":
             # Truncate chat messages
             target_idx = selected["message_index"]
-            self.messages = self.messages[:target_idx]
+            self._reset_msgs(self.messages[:target_idx])
             self.chat_session.messages = self.chat_session.messages[:target_idx]
             
             # Truncate checkpoints list
@@ -785,16 +884,11 @@ class Agent:
     def _handle_checkpoint(self, args: list[str]) -> None:
         """Save a manual checkpoint and link it to the current chat."""
         msg = " ".join(args) if args else "manual checkpoint"
-        if checkpoint.save(msg):
+        git_hash = checkpoint.save(msg)
+        if git_hash:
             ui.success(f"Checkpoint saved: [cyan]{msg}[/]")
-            try:
-                from git import Repo
-                repo = Repo(".", search_parent_directories=True)
-                git_hash = repo.head.commit.hexsha
-                self.chat_session.add_checkpoint(git_hash, msg)
-                self._save_chat_session()
-            except Exception:
-                pass
+            self.chat_session.add_checkpoint(git_hash, msg)
+            self._save_chat_session()
         else:
             ui.info("Nothing to checkpoint (no changes).")
 
@@ -851,20 +945,21 @@ class Agent:
             session = ChatSession.load(sid)
             self.chat_session = session
             # Rebuild messages from session history
-            self.messages = []
+            self._reset_msgs()
             self._rebuild_system_prompt()
             for msg in session.get_messages("conversation_and_code"):
-                self.messages.append(msg)
+                self._add_msg(msg)
             # Clean up any orphaned tool messages
             self._sanitize_messages()
 
             # Clear terminal and show history
-            import os
-            os.system("clear" if os.name != "nt" else "cls")
+            ui.clear_screen()
             show_chat_detail(session)
             ui.success(f"Resumed chat: [cyan]{session.title or session.id}[/] ({len(session.messages)} msgs)")
         except FileNotFoundError:
             ui.warning(f"Chat [cyan]{sid}[/] not found.")
+        except (OSError, ValueError) as e:  # Unreadable, corrupt, or .zst without zstandard
+            ui.error(f"Could not resume chat [cyan]{sid}[/]: {e}")
 
     def _sanitize_messages(self) -> None:
         """Remove orphaned tool messages that lack matching tool_calls.
@@ -874,27 +969,21 @@ class Agent:
         Orphaned tool results (e.g. from corrupted history) cause a hard crash.
         """
         # Collect all valid tool_call_ids from assistant messages
-        valid_ids: set[str] = set()
-        for msg in self.messages:
-            if msg.get("role") == "assistant":
-                for tc in msg.get("tool_calls", []):
-                    tc_id = tc.get("id", "")
-                    if tc_id:
-                        valid_ids.add(tc_id)
+        valid_ids = {
+            tc["id"]
+            for m in self.messages if m.get("role") == "assistant"
+            for tc in m.get("tool_calls") or () if tc.get("id")
+        }
 
         # Filter out tool messages whose tool_call_id isn't in valid_ids
-        cleaned = []
-        removed = 0
-        for msg in self.messages:
-            if msg.get("role") == "tool":
-                tcid = msg.get("tool_call_id", "")
-                if tcid not in valid_ids:
-                    removed += 1
-                    continue
-            cleaned.append(msg)
+        cleaned = [
+            m for m in self.messages
+            if m.get("role") != "tool" or m.get("tool_call_id", "") in valid_ids
+        ]
+        removed = len(self.messages) - len(cleaned)
 
         if removed:
-            self.messages = cleaned
+            self._reset_msgs(cleaned)
             ui.dim(f"  Cleaned {removed} orphaned tool message(s) from history.")
 
     def _handle_export(self, args: list[str]) -> None:
@@ -904,26 +993,25 @@ class Agent:
         if not messages:
             ui.info("Nothing to export — current chat is empty.")
             return
-        lines = [f"# Chat: {self.chat_session.title or 'Untitled'}\n"]
-        lines.append(f"Model: {self.chat_session.model}\n")
-        for msg in messages:
-            role = msg.get("role", "unknown").upper()
-            content = msg.get("content", "")
-            lines.append(f"---\n\n**{role}:**\n\n{content}\n")
+        header = f"# Chat: {self.chat_session.title or 'Untitled'}\n\nModel: {self.chat_session.model}\n\n"
+        body = "\n".join(
+            f"---\n\n**{m.get('role', 'unknown').upper()}:**\n\n{m.get('content') or ''}\n"
+            for m in messages
+        )
         export_path = Path(f".amas/exports/{self.chat_session.id}.md")
         export_path.parent.mkdir(parents=True, exist_ok=True)
-        export_path.write_text("\n".join(lines))
+        export_path.write_bytes((header + body).encode("utf-8"))
         ui.success(f"Exported to [cyan]{export_path}[/]")
 
     def _save_chat_session(self) -> None:
         """Persist the current chat session to disk."""
         if self.chat_session.messages:
-            self.chat_session.save()
+            self.chat_session.save_later()
 
     def chat_turn(self, user_input: str) -> None:
         """Process one user message through the LLM, executing tools as needed."""
         user_input = self._expand_at_refs(user_input)
-        self.messages.append({"role": "user", "content": user_input})
+        self._add_msg({"role": "user", "content": user_input})
         _append_history("user", user_input)
         self.chat_session.add_message("user", user_input)
         self.actions = []
@@ -952,7 +1040,7 @@ class Agent:
                     config=self.config,
                     on_chunk=streaming.on_chunk,
                 )
-            self.messages.append(response)
+            self._add_msg(response)
             if response.get("content"):
                 _append_history("assistant", response["content"])
                 self.chat_session.add_message(
@@ -976,7 +1064,7 @@ class Agent:
 
                 self.chat_session.add_message("tool", result, tool_call_id=tool_id)
 
-                self.messages.append({
+                self._add_msg({
                     "role": "tool",
                     "tool_call_id": tool_id,
                     "content": result,
@@ -985,26 +1073,24 @@ class Agent:
                 # Auto-checkpoint file operations
                 if func_name in ("write_file", "edit_file", "create_file", "delete_file"):
                     if not result.startswith("Error") and "declined" not in result.lower():
-                        try:
-                            from git import Repo
-                            repo = Repo(".", search_parent_directories=True)
-                            git_hash = repo.head.commit.hexsha
+                        # The tool already checkpointed; reuse the hash its save() produced
+                        git_hash = checkpoint.last_hash()
+                        if git_hash:
                             self.chat_session.add_checkpoint(git_hash, f"{func_name}: {result[:60]}")
-                        except Exception:
-                            pass
 
         if self.actions:
             ui.show_summary(self.actions)
 
         # Auto-save chat session after each turn
         self._save_chat_session()
+        _flush_history()
 
     def _check_auto_compact(self) -> None:
         """Warn if context is getting too large."""
-        total_chars = sum(len(m.get("content", "")) for m in self.messages)
-        est_tokens = total_chars // 4
         threshold = self.config.get("max_context_tokens", 32000)
-        if est_tokens > threshold * 0.8:
+        # 80% of the limit at ~4 chars/token, compared in chars (kept current by _add_msg/_reset_msgs)
+        if self._ctx_chars > threshold * 3.2:
+            est_tokens = self._ctx_chars // 4
             ui.warning(f"Context (~{est_tokens:,} tokens) is {est_tokens/threshold*100:.0f}% of limit. Use [cyan]/compact[/] to summarize.")
 
     def run(self) -> None:
@@ -1012,7 +1098,7 @@ class Agent:
         ui.show_welcome()
         model = self.config["model"]
         has_key = bool(self.config.get("api_key"))
-        provider = model.split("/")[0] if "/" in model else "auto"
+        provider = _display_provider(model)
         ui.show_model_info(model, provider, has_key)
 
         # Show hint about recent chats
@@ -1042,17 +1128,54 @@ class Agent:
 
         # Save session on exit
         self._save_chat_session()
+        history.flush()
 
 
 def _parse_args_for_display(args_json: str) -> dict:
     """Parse tool args JSON for display, truncating long values."""
     try:
-        args = json.loads(args_json) if args_json else {}
+        args = _loads(args_json) if args_json else {}
         return {k: (str(v)[:100] + "..." if len(str(v)) > 100 else v) for k, v in args.items()}
-    except (json.JSONDecodeError, AttributeError):
+    except (ValueError, AttributeError):
         return {"raw": args_json[:200] if args_json else ""}
 
 
+@lru_cache(maxsize=None)
+def _display_provider(model: str) -> str:
+    """Provider label for status lines: the 'provider/' prefix, or 'auto' (litellm infers it)."""
+    return model.split("/")[0] if "/" in model else "auto"
+
+
+_today_cache: tuple[int, str] = (0, "")
+
+
+def _today_str() -> str:
+    """Today's date as shown in the system prompt (formatted once per day)."""
+    global _today_cache
+    today = datetime.date.today()
+    if _today_cache[0] != today.toordinal():
+        _today_cache = (today.toordinal(), today.strftime("%A, %B %d, %Y"))
+    return _today_cache[1]
+
+
+def _safe_read(path: str) -> tuple[str | None, str]:
+    """Read an @-referenced file. Returns (content, "") or (None, "missing" | "binary" | error)."""
+    p = Path(path)
+    if not (p.exists() and p.is_file()):
+        return None, "missing"
+    try:
+        return p.read_text(encoding="utf-8"), ""
+    except UnicodeDecodeError:
+        return None, "binary"
+    except Exception as e:
+        return None, str(e)
+
+
+def _msg_chars(msg: dict) -> int:
+    """Content length of a message (assistant tool-call messages may have None content)."""
+    return len(msg.get("content") or "")
+
+
 def _show_tool_result(name: str, result: str) -> None:
     """Display concise tool result feedback."""
     if result.startswith("Error"):
@@ -1064,48 +1187,44 @@ def _show_tool_result(name: str, result: str) -> None:
         ui.success(first_line[:150])
 
 
+_history_buf: list[bytes] = []  # history.jsonl lines awaiting _flush_history()
+
+
 def _append_history(role: str, content: str) -> None:
-    """Append a turn to .amas/history.jsonl (append-only log)."""
+    """Queue a turn for .amas/history.jsonl (append-only log, written once per chat turn)."""
+    try:
+        _history_buf.append(_dumps({"ts": time.time(), "role": role, "content": content[:2000]}) + b"\n")
+    except Exception:
+        pass  # Never crash the agent for logging
+
+
+def _flush_history() -> None:
+    """Append all queued turns to .amas/history.jsonl in a single write."""
+    if not _history_buf:
+        return
     try:
         p = Path(".amas/history.jsonl")
         p.parent.mkdir(exist_ok=True)
-        with p.open("a") as f:
-            json.dump({"ts": time.time(), "role": role, "content": content[:2000]}, f)
-            f.write("\n")
+        with p.open("ab") as f:
+            f.write(b"".join(_history_buf))
     except Exception:
         pass  # Never crash the agent for logging
+    _history_buf.clear()
 
 
-def _scan_project_files(root: Path, ignore: set, max_depth: int = 5) -> list[tuple[str, str]]:
-    """Walk project files and return (relpath, human_size) pairs for @ completions."""
-    result: list[tuple[str, str]] = []
-    _walk_for_files(root, root, ignore, max_depth, 0, result)
-    return result
+def _dumps(obj) -> bytes:
+    """Compact JSON bytes, via orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
 
 
-def _walk_for_files(p: Path, root: Path, ignore: set, max_depth: int, depth: int, out: list) -> None:
-    """Recursively collect file paths for the @ completer."""
-    if depth > max_depth:
-        return
-    try:
-        for entry in sorted(p.iterdir()):
-            if entry.name in ignore or entry.name.startswith(".") or any(entry.match(ig) for ig in ignore):
-                continue
-            if entry.is_dir():
-                _walk_for_files(entry, root, ignore, max_depth, depth + 1, out)
-            elif entry.is_file():
-                try:
-                    rel = str(entry.relative_to(root))
-                    sz = entry.stat().st_size
-                    for unit in ("B", "KB", "MB", "GB"):
-                        if sz < 1024:
-                            size_str = f"{sz:.0f}{unit}" if unit == "B" else f"{sz:.1f}{unit}"
-                            break
-                        sz /= 1024
-                    else:
-                        size_str = f"{sz:.1f}TB"
-                    out.append((rel, size_str))
-                except (ValueError, OSError):
-                    pass
-    except PermissionError:
-        pass
+def _loads(raw: str | bytes):
+    """Parse JSON, via orjson when installed (its errors subclass ValueError)."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+atexit.register(_flush_history)
+
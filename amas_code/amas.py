@@ -50,44 +50,43 @@ def _config_wizard() -> None:
     """Interactive first-run setup wizard."""
     ui.console.print("\n[bold bright_cyan]🔧 Amas Code — Configuration Wizard[/]\n")
 
-    cfg = config_mod.load()
-
-    # Model selection
-    ui.info("Select your default model:")
-    for i, m in enumerate(config_mod.KNOWN_MODELS, 1):
-        marker = " [green]◀ current[/]" if m == cfg.get("model") else ""
-        ui.console.print(f"  [cyan]{i:2}.[/] {m}{marker}")
-
-    choice = ui.prompt_input("Enter number or model name (press Enter to keep current)")
-    if choice:
-        if choice.isdigit() and 1 <= int(choice) <= len(config_mod.KNOWN_MODELS):
-            cfg["model"] = config_mod.KNOWN_MODELS[int(choice) - 1]
-        else:
-            cfg["model"] = choice
-        ui.success(f"Model set to: [cyan]{cfg['model']}[/]")
-
-    # API key setup
-    model = cfg["model"]
-    provider = model.split("/")[0] if "/" in model else config_mod._guess_provider(model)
-    if provider:
-        existing = config_mod.resolve_api_key(cfg)
-        if existing:
-            ui.info(f"API key for [cyan]{provider}[/] already configured.")
-            change = ui.prompt_input("Change it? (y/n)")
-            if change.lower() not in ("y", "yes"):
-                provider = ""  # Skip
-
+    # One load and one write for the whole wizard
+    with config_mod.batch() as cfg:
+        # Model selection
+        ui.info("Select your default model:")
+        for i, m in enumerate(config_mod.KNOWN_MODELS, 1):
+            marker = " [green]◀ current[/]" if m == cfg.get("model") else ""
+            ui.console.print(f"  [cyan]{i:2}.[/] {m}{marker}")
+
+        choice = ui.prompt_input("Enter number or model name (press Enter to keep current)")
+        if choice:
+            if choice.isdigit() and 1 <= int(choice) <= len(config_mod.KNOWN_MODELS):
+                cfg["model"] = config_mod.KNOWN_MODELS[int(choice) - 1]
+            else:
+                cfg["model"] = choice
+            ui.success(f"Model set to: [cyan]{cfg['model']}[/]")
+
+        # API key setup
+        model = cfg["model"]
+        provider = config_mod.provider_of(model)
         if provider:
-            env_var = config_mod.PROVIDER_ENV_VARS.get(provider, "")
-            hint = f" (or set env var [cyan]{env_var}[/])" if env_var else ""
-            key = ui.prompt_input(f"Enter API key for {provider}{hint}", password=True)
-            if key:
-                if "api_keys" not in cfg:
-                    cfg["api_keys"] = {}
-                cfg["api_keys"][provider] = key
-                ui.success(f"API key for [cyan]{provider}[/] saved.")
-
-    config_mod.save(cfg)
+            existing = config_mod.resolve_api_key(cfg)
+            if existing:
+                ui.info(f"API key for [cyan]{provider}[/] already configured.")
+                change = ui.prompt_input("Change it? (y/n)")
+                if change.lower() not in ("y", "yes"):
+                    provider = ""  # Skip
+
+            if provider:
+                env_var = config_mod.PROVIDER_ENV_VARS.get(provider, "")
+                hint = f" (or set env var [cyan]{env_var}[/])" if env_var else ""
+                key = ui.prompt_input(f"Enter API key for {provider}{hint}", password=True)
+                if key:
+                    if "api_keys" not in cfg:
+                        cfg["api_keys"] = {}
+                    cfg["api_keys"][provider] = key
+                    ui.success(f"API key for [cyan]{provider}[/] saved.")
+
     ui.success("Configuration saved to [cyan].amas/config.yaml[/]")
     ui.console.print()
 
@@ -1,17 +1,30 @@
 """Git-based checkpoints — save, undo, redo, list, restore."""
+import os
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from typing import NamedTuple
 
 from amas_code import ui
 
 # Checkpoint commit message prefix
 _PREFIX = "[amas] "
 
+_last_hash: str | None = None  # HEAD as of the most recent save()
+_REPO = None                   # Cached git.Repo for _REPO_CWD
+_REPO_CWD: str | None = None
+
 
 def _repo():
-    """Get or init a git repo. Lazy import to keep startup fast."""
+    """Get or init a git repo, cached per working directory. Lazy import to keep startup fast."""
+    global _REPO, _REPO_CWD
+    cwd = os.getcwd()
+    if _REPO is not None and cwd == _REPO_CWD:
+        return _REPO
+
     from git import Repo, InvalidGitRepositoryError
     try:
-        return Repo(".", search_parent_directories=True)
+        repo = Repo(".", search_parent_directories=True)
     except InvalidGitRepositoryError:
         ui.info("Initializing git repo for checkpoints...")
         repo = Repo.init(".")
@@ -20,7 +33,9 @@ def _repo():
             repo.index.add(repo.untracked_files)
             repo.index.commit(f"{_PREFIX}Initial checkpoint")
             ui.success("Created initial checkpoint.")
-        return repo
+    _REPO, _REPO_CWD = repo, cwd
+    _commit_numstat.cache_clear()  # Hash-keyed cache belongs to the previous repo
+    return repo
 
 
 def _tracked_files(repo) -> list[str]:
@@ -31,23 +46,31 @@ def _tracked_files(repo) -> list[str]:
         return []
 
 
-def save(message: str = "checkpoint") -> bool:
-    """Create a checkpoint (git commit) with current changes."""
+def save(message: str = "checkpoint") -> str | None:
+    """Create a checkpoint (git commit) with current changes. Returns its hash, or None if nothing changed."""
+    global _last_hash
     try:
         repo = _repo()
 
-        # Stage all changes
+        # Stage all changes (new files included, so no separate untracked-files scan)
         repo.git.add(A=True)
 
-        # Check if there are changes to commit
-        if not repo.index.diff("HEAD") and not repo.untracked_files:
-            return False  # Nothing to checkpoint
+        # Check if there are changes to commit — a single `git diff --cached`
+        if not repo.is_dirty(index=True, working_tree=False, untracked_files=False):
+            _last_hash = repo.head.commit.hexsha
+            return None  # Nothing to checkpoint
 
-        repo.index.commit(f"{_PREFIX}{message}")
-        return True
+        # Commit in-process; the returned object already carries the new hash
+        _last_hash = repo.index.commit(f"{_PREFIX}{message}").hexsha
+        return _last_hash
     except Exception as e:
         ui.error(f"Checkpoint failed: {e}")
-        return False
+        return None
+
+
+def last_hash() -> str | None:
+    """HEAD as of the most recent save(), without reopening the repo."""
+    return _last_hash
 
 
 def undo() -> str:
@@ -61,8 +84,8 @@ def undo() -> str:
 
         # Reset to previous checkpoint
         target = commits[1]
-        repo.head.reset(target, index=True, working_tree=True)
-        return f"Undone to: {target.message.replace(_PREFIX, '').strip()}"
+        repo.head.reset(target.hexsha, index=True, working_tree=True)
+        return f"Undone to: {target.message}"
     except Exception as e:
         return f"Undo failed: {e}"
 
@@ -71,13 +94,13 @@ def list_checkpoints(limit: int = 10) -> list[dict]:
     """List recent Amas checkpoints."""
     try:
         repo = _repo()
-        commits = _amas_commits(repo, limit=limit)
+        commits = _amas_commits(repo, limit=limit, with_files=True)
         return [
             {
                 "hash": c.hexsha[:8],
-                "message": c.message.replace(_PREFIX, "").strip(),
-                "time": c.committed_datetime.strftime("%H:%M:%S"),
-                "files": len(c.stats.files),
+                "message": c.message,
+                "time": datetime.fromtimestamp(c.timestamp).strftime("%H:%M:%S"),
+                "files": c.files,
             }
             for c in commits
         ]
@@ -105,6 +128,15 @@ def restore(hash_prefix: str) -> str:
         return f"Restore failed: {e}"
 
 
+def parent_of(commit_hash: str) -> str | None:
+    """Hash of a commit's first parent, or None for a root commit or unknown hash."""
+    try:
+        parents = _repo().commit(commit_hash).parents
+        return parents[0].hexsha if parents else None
+    except Exception:
+        return None
+
+
 def get_diff_between(start_hash: str, end_hash: str = "HEAD") -> str:
     """Get the diff between two specific commits."""
     try:
@@ -114,27 +146,63 @@ def get_diff_between(start_hash: str, end_hash: str = "HEAD") -> str:
         return f"Could not get diff: {e}"
 
 
-def get_diff(commit_hash: str) -> str:
-    """Get the diff for a specific commit compared to its parent."""
+def get_diff_stats(commit_hash: str) -> tuple[int, int]:
+    """(added, removed) line counts for a commit vs its parent, from `git diff --numstat`."""
     try:
-        repo = _repo()
-        commit = repo.commit(commit_hash)
-        if not commit.parents:
-            return "Initial checkpoint (no parent)"
-        return repo.git.diff(commit.parents[0].hexsha, commit.hexsha)
-    except Exception as e:
-        return f"Could not get diff: {e}"
+        return _commit_numstat(commit_hash)
+    except Exception:
+        return 0, 0
+
+
+# A commit's diff against its parent never changes, so its stats are cached by hash
+# (failures raise and are therefore never cached).
+
+@lru_cache(maxsize=256)
+def _commit_numstat(commit_hash: str) -> tuple[int, int]:
+    repo = _repo()
+    commit = repo.commit(commit_hash)
+    if not commit.parents:
+        return 0, 0
+    added = removed = 0
+    for line in repo.git.diff("--numstat", commit.parents[0].hexsha, commit.hexsha).splitlines():
+        a, r, _ = line.split("\t", 2)
+        if a != "-":  # Binary files report "-"
+            added += int(a)
+            removed += int(r)
+    return added, removed
+
+
+class _Checkpoint(NamedTuple):
+    """Lightweight view of an Amas commit (message has the prefix stripped)."""
+    hexsha: str
+    timestamp: int
+    message: str
+    files: int = 0  # Files changed; only filled in when asked for (with_files=True)
+
 
+def _amas_commits(repo, limit: int = 20, with_files: bool = False) -> list[_Checkpoint]:
+    """Get recent commits made by Amas — git does the filtering in `git log --grep`.
 
-def _amas_commits(repo, limit: int = 20) -> list:
-    """Get recent commits made by Amas."""
+    With `with_files`, the same call adds --numstat so file counts need no per-commit diff.
+    """
     result = []
     try:
-        for commit in repo.iter_commits(max_count=100):
-            if commit.message.startswith(_PREFIX):
-                result.append(commit)
-                if len(result) >= limit:
-                    break
+        count = limit
+        while True:
+            result = []
+            args = ["--grep=^\\[amas\\] ", f"--max-count={count}", "--format=%x00%H%x01%ct%x01%s"]
+            if with_files:
+                args.append("--numstat")
+            blocks = repo.git.log(*args).split("\x00")[1:]
+            for block in blocks:
+                header, *stats = block.splitlines()
+                hexsha, ts, subject = header.split("\x01", 2)
+                if subject.startswith(_PREFIX):  # --grep matches any line; the prefix must lead the subject
+                    files = sum(1 for line in stats if line)
+                    result.append(_Checkpoint(hexsha, int(ts), subject[len(_PREFIX):].strip(), files))
+            if len(result) >= limit or len(blocks) < count:
+                break
+            count *= 2  # Some matches were only in a commit body — look further back
     except Exception:
         pass
-    return result
+    return result[:limit]
@@ -1,9 +1,20 @@
 """Config loader — YAML config with sane defaults + API key management."""
+import copy
+import fnmatch
 import os
+import re
+from collections import ChainMap
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 
 import yaml
 
+try:  # libyaml bindings are several times faster when PyYAML was built with them
+    from yaml import CSafeDumper as _Dumper, CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeDumper as _Dumper, SafeLoader as _Loader
+
 DEFAULT_CONFIG = {
     "model": "gemini/gemini-3-flash-preview",
     "auto_accept": False,
@@ -13,6 +24,15 @@ DEFAULT_CONFIG = {
     "ignore": ["node_modules", "__pycache__", ".git", "*.pyc", "dist", "build"],
 }
 
+
+@lru_cache(maxsize=16)
+def compile_ignore(patterns: tuple[str, ...]) -> tuple[frozenset, re.Pattern | None]:
+    """Split ignore patterns into exact names (set lookup) and one regex for all wildcard globs."""
+    globs = [p for p in patterns if any(c in p for c in "*?[")]
+    glob_re = re.compile("|".join(fnmatch.translate(g) for g in globs)) if globs else None
+    return frozenset(patterns).difference(globs), glob_re
+
+
 # Provider → env var name mapping (litellm also reads these automatically)
 PROVIDER_ENV_VARS = {
     "gemini": "GEMINI_API_KEY",
@@ -50,26 +70,45 @@ KNOWN_MODELS = [
 ]
 
 
-def load(path: str = ".amas/config.yaml") -> dict:
-    """Load config from YAML, merging with defaults."""
-    p = Path(path)
-    if p.exists():
-        user = yaml.safe_load(p.read_text()) or {}
-        return {**DEFAULT_CONFIG, **user}
-    return DEFAULT_CONFIG.copy()
+# path → (mtime_ns, parsed user config); reparsed only when the file changes
+_CONFIG_CACHE: dict[str, tuple[int, dict]] = {}
 
 
-def save(config: dict, path: str = ".amas/config.yaml") -> None:
-    """Save config to YAML file."""
+def load(path: str = ".amas/config.yaml") -> ChainMap:
+    """Load config from YAML layered over the defaults (writes land in the user map)."""
+    p = Path(path)
+    try:
+        mtime = p.stat().st_mtime_ns
+    except OSError:
+        return ChainMap({}, DEFAULT_CONFIG)
+    cached = _CONFIG_CACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, yaml.load(p.read_text(), Loader=_Loader) or {})
+        _CONFIG_CACHE[path] = cached
+    # Deep copy so callers mutating nested values (api_keys) can't corrupt the cache
+    return ChainMap(copy.deepcopy(cached[1]), DEFAULT_CONFIG)
+
+
+def save(config: dict | ChainMap, path: str = ".amas/config.yaml") -> None:
+    """Save config to YAML file (only the user layer of a loaded config, never the defaults)."""
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(yaml.dump(config, default_flow_style=False))
+    data = dict(config.maps[0]) if isinstance(config, ChainMap) else dict(config)
+    p.write_text(yaml.dump(data, Dumper=_Dumper, default_flow_style=False))
+    _CONFIG_CACHE.pop(path, None)
+
+
+@contextmanager
+def batch(path: str = ".amas/config.yaml"):
+    """Load the config once, yield it for edits, and write it once on a clean exit."""
+    config = load(path)
+    yield config
+    save(config, path)
 
 
 def resolve_api_key(config: dict) -> str | None:
     """Resolve API key: config api_keys → env var → None (litellm fallback)."""
-    model = config.get("model", "")
-    provider = model.split("/")[0] if "/" in model else _guess_provider(model)
+    provider = provider_of(config.get("model", ""))
 
     # 1. Check config api_keys dict
     keys = config.get("api_keys", {})
@@ -85,6 +124,13 @@ def resolve_api_key(config: dict) -> str | None:
     return None
 
 
+@lru_cache(maxsize=None)
+def provider_of(model: str) -> str:
+    """Provider for a model: its 'provider/' prefix, else a guess from the name."""
+    return model.split("/")[0] if "/" in model else _guess_provider(model)
+
+
+@lru_cache(maxsize=None)
 def _guess_provider(model: str) -> str:
     """Guess provider from model name when no prefix like 'gemini/' is used."""
     model_lower = model.lower()
@@ -101,21 +147,16 @@ def _guess_provider(model: str) -> str:
 
 def set_api_key(provider: str, key: str, path: str = ".amas/config.yaml") -> None:
     """Set an API key for a provider and save to config."""
-    config = load(path)
-    if "api_keys" not in config:
-        config["api_keys"] = {}
-    config["api_keys"][provider] = key
+    with batch(path) as config:
+        config.setdefault("api_keys", {})[provider] = key
 
     # Also set the env var for the current session so litellm picks it up
     env_var = PROVIDER_ENV_VARS.get(provider, "")
     if env_var:
         os.environ[env_var] = key
 
-    save(config, path)
-
 
 def set_model(model: str, path: str = ".amas/config.yaml") -> None:
     """Set the default model and save to config."""
-    config = load(path)
-    config["model"] = model
-    save(config, path)
+    with batch(path) as config:
+        config["model"] = model
@@ -0,0 +1,188 @@
+"""Incremental project file index for @ completions.
+
+Directory listings are cached in .amas/file_index.json together with each
+directory's mtime, so a refresh only rescans directories whose contents
+changed since the last walk instead of re-listing the whole tree.
+"""
+import json
+import os
+import re
+from collections import deque
+from pathlib import Path
+
+from amas_code.config import compile_ignore
+
+CACHE_PATH = Path(".amas/file_index.json")
+_VERSION = 1
+MAX_DEPTH = 5
+
+# ── Module state ─────────────────────────────────────────────────────────────
+# rel dir ("" = root) → [mtime_ns, subdir names, {file name: size}]
+_dirs: dict[str, list] = {}
+_ignore: tuple[str, ...] = ()
+_loaded = False
+_paths: list[str] = []    # Sorted relpaths
+_lowered: list[str] = []  # Parallel lowercased relpaths for matching
+_sizes: list[int] = []    # Parallel file sizes
+_bigrams: dict[str, list[int]] = {}  # 2-gram → sorted indices of paths containing it
+
+
+def refresh(ignore: set) -> None:
+    """Bring the index up to date, rescanning only directories whose mtime changed."""
+    global _dirs, _ignore
+    key = tuple(sorted(ignore))
+    if not _loaded:
+        _load(key)
+    if key != _ignore:
+        _dirs, _ignore = {}, key
+
+    seen: dict[str, list] = {}
+    changed = _refresh_tree("", 0, compile_ignore(key), seen)
+    if changed or len(seen) != len(_dirs):
+        _dirs = seen
+        _rebuild()
+        _save()
+
+
+def search(partial: str) -> list[tuple[str, str]]:
+    """Return (relpath, human_size) pairs whose path contains `partial` (case-insensitive).
+
+    Candidates come from intersecting the 2-gram posting lists, so only paths
+    sharing every 2-gram with `partial` get the final substring check.
+    """
+    partial_lower = partial.lower()
+    if len(partial_lower) < 2:
+        candidates = range(len(_lowered))
+    else:
+        postings = [_bigrams.get(g) for g in {partial_lower[i:i + 2] for i in range(len(partial_lower) - 1)}]
+        if not all(postings):
+            return []
+        postings.sort(key=len)
+        hits = set(postings[0])
+        for plist in postings[1:]:
+            hits.intersection_update(plist)
+        candidates = sorted(hits)
+    return [(_paths[i], _human_size(_sizes[i])) for i in candidates if partial_lower in _lowered[i]]
+
+
+def touch(path: str) -> None:
+    """Synchronously rescan the directory containing `path` after the agent changed it."""
+    if not _dirs:
+        return
+    try:
+        rel_dir = os.path.dirname(os.path.relpath(path))
+    except ValueError:
+        return
+    if rel_dir.startswith(".."):
+        return
+    while rel_dir and rel_dir not in _dirs:  # New dirs: rescan from the nearest indexed ancestor
+        rel_dir = os.path.dirname(rel_dir)
+    if rel_dir not in _dirs:
+        return
+
+    _dirs[rel_dir][0] = -1
+    seen: dict[str, list] = {}
+    _refresh_tree(rel_dir, rel_dir.count(os.sep) + 1 if rel_dir else 0, compile_ignore(_ignore), seen)
+    prefix = rel_dir + os.sep if rel_dir else ""
+    for stale in [d for d in _dirs if d == rel_dir or d.startswith(prefix)]:
+        del _dirs[stale]
+    _dirs.update(seen)
+    _rebuild()
+    _save()
+
+
+def _refresh_tree(root: str, depth: int, rules: tuple[frozenset, re.Pattern | None], seen: dict) -> bool:
+    """Refresh `root` and everything below it breadth-first, reusing listings whose mtime is unchanged."""
+    # Not os.walk: it would re-list every directory, while unchanged ones here cost a single stat.
+    # Ignored and symlinked dirs never reach the queue, so whole subtrees are pruned up front.
+    changed = False
+    queue = deque([(root, depth)])
+    while queue:
+        rel, depth = queue.popleft()
+        path = rel or "."
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            changed = True
+            continue
+
+        entry = _dirs.get(rel)
+        if entry is None or entry[0] != mtime:
+            entry = [mtime, *_scan_dir(path, rules)]
+            changed = True
+        seen[rel] = entry
+
+        if depth < MAX_DEPTH:
+            queue.extend((os.path.join(rel, name), depth + 1) for name in entry[1])
+    return changed
+
+
+def _scan_dir(path: str, rules: tuple[frozenset, re.Pattern | None]) -> tuple[list[str], dict[str, int]]:
+    """List one directory: (kept subdir names, {kept file name: size})."""
+    subdirs, files = [], {}
+    exact, glob_re = rules
+    try:
+        with os.scandir(path) as it:
+            for e in it:
+                name = e.name
+                if name.startswith(".") or name in exact or (glob_re and glob_re.match(name)):
+                    continue
+                try:
+                    # d_type answers both checks without a stat; symlinked dirs aren't followed
+                    if e.is_dir(follow_symlinks=False):
+                        subdirs.append(name)
+                    elif e.is_file():
+                        files[name] = e.stat().st_size
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return subdirs, files
+
+
+def _rebuild() -> None:
+    """Rebuild the flat sorted path list and its 2-gram index from the directory listings."""
+    global _paths, _lowered, _sizes, _bigrams
+    pairs = sorted(
+        (os.path.join(rel, name), size)
+        for rel, (_, _, files) in _dirs.items()
+        for name, size in files.items()
+    )
+    _paths = [p for p, _ in pairs]
+    _lowered = [p.lower() for p in _paths]
+    _sizes = [s for _, s in pairs]
+    _bigrams = {}
+    for i, p in enumerate(_lowered):
+        for g in {p[j:j + 2] for j in range(len(p) - 1)}:
+            _bigrams.setdefault(g, []).append(i)
+
+
+def _load(key: tuple[str, ...]) -> None:
+    """Load the persisted index (ignored if missing, corrupt, or built with other ignores)."""
+    global _dirs, _ignore, _loaded
+    _loaded = True
+    try:
+        data = json.loads(CACHE_PATH.read_text(encoding="utf-8"))
+        if data.get("version") == _VERSION and tuple(data.get("ignore", ())) == key:
+            _dirs, _ignore = data["dirs"], key
+            _rebuild()
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+
+def _save() -> None:
+    """Persist the directory listings (never crash completion for a cache write)."""
+    try:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        CACHE_PATH.write_text(json.dumps({"version": _VERSION, "ignore": list(_ignore), "dirs": _dirs}), encoding="utf-8")
+    except OSError:
+        pass
+
+
+def _human_size(size: float) -> str:
+    """Format bytes as human-readable size."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TB"
@@ -1,6 +1,11 @@
 """Chat history — persistent chat sessions with checkpoints and replay modes.
 
-Each chat session is stored as a JSON file in .amas/chats/ and tracks:
+Each chat session is stored as a folder in .amas/chats/<id>/ holding a small
+header.json (metadata + checkpoints) and an append-only messages.jsonl, so a
+save only writes the messages added since the last one (zstd-compressed as
+messages.jsonl.zst, one frame per append, when `zstandard` is installed).
+Older single-file <id>.json / <id>.json.zst sessions are still read and are
+migrated to the folder layout on their next save. A session tracks:
 - All conversation messages (user, assistant, tool)
 - Checkpoints (git commit hashes) created during the session
 - Metadata (start time, model, title)
@@ -9,20 +14,46 @@ Replay modes:
 - CONVERSATION_ONLY: Show only user/assistant messages (no tool calls/results)
 - CONVERSATION_AND_CODE: Show everything including file changes and tool outputs
 """
+import atexit
 import json
+import os
+import re
+import shutil
+import threading
 import time
 import uuid
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Literal
 
+from rich.markdown import Markdown
+from rich.panel import Panel
+from rich.table import Table
+from rich.text import Text
+
 from amas_code import ui
 
+try:
+    import orjson  # Optional speedup: pip install amas-code[speed]
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard  # Optional: zstd-compressed session files
+except ImportError:
+    zstandard = None
+
 # ── Types ────────────────────────────────────────────────────────────────────
 
 ReplayMode = Literal["conversation_only", "conversation_and_code"]
 
 CHATS_DIR = Path(".amas/chats")
+_MARKDOWN_CHARS = frozenset("`*_#[]()<>&|~\\+-=!")  # Anything Markdown could render differently
+_HEADER = "header.json"
+_MESSAGE_FILES = ("messages.jsonl.zst", "messages.jsonl")
+_MESSAGES = _MESSAGE_FILES[0] if zstandard else _MESSAGE_FILES[1]  # Format new writes use
+_LEGACY_SUFFIXES = (".json.zst", ".json")  # Single-file sessions from before the folder layout
 
 
 # ── ChatSession ──────────────────────────────────────────────────────────────
@@ -36,27 +67,42 @@ class ChatSession:
         self.model: str = ""
         self.started_at: float = time.time()
         self.updated_at: float = time.time()
-        self.messages: list[dict] = []
+        self._messages: list[dict] = []
+        self._user_count = 0  # Kept current by add_message and the messages setter
+        self._saved = 0  # Messages already on disk; 0 means the next write starts the file afresh
         self.checkpoints: list[dict] = []  # {hash, message, timestamp, message_index}
 
+    @property
+    def messages(self) -> list[dict]:
+        return self._messages
+
+    @messages.setter
+    def messages(self, value: list[dict]) -> None:
+        self._messages = value
+        self._user_count = sum(1 for m in value if m.get("role") == "user")
+        self._saved = 0  # Replaced history (e.g. a /rewind truncation) is rewritten in full
+
     @property
     def path(self) -> Path:
-        return CHATS_DIR / f"{self.id}.json"
+        return CHATS_DIR / self.id
 
     def add_message(self, role: str, content: str, tool_calls: list | None = None,
                     tool_call_id: str | None = None) -> None:
         """Record a message in the session."""
+        now = time.time()
         msg = {
             "role": role,
-            "content": content[:5000],  # Cap to avoid huge files
-            "timestamp": time.time(),
+            "content": content if len(content) <= 5000 else content[:5000],  # Cap to avoid huge files
+            "timestamp": now,
         }
         if tool_calls:
             msg["tool_calls"] = tool_calls
         if tool_call_id:
             msg["tool_call_id"] = tool_call_id
-        self.messages.append(msg)
-        self.updated_at = time.time()
+        self._messages.append(msg)
+        self.updated_at = now
+        if role == "user":
+            self._user_count += 1
 
         # Auto-title from first user message
         if not self.title and role == "user" and content.strip():
@@ -73,23 +119,13 @@ class ChatSession:
         self.checkpoints.append(cp)
         self.updated_at = time.time()
 
-    def undo_to_checkpoint(self, index: int = -1) -> dict | None:
-        """Move a checkpoint and return the target to restore to.
-
-        Args:
-            index: Checkpoint index to undo to. -1 means the latest.
-
-        Returns:
-            The checkpoint to restore to (the one before the undone one), or None.
-        """
+    def undo_to_checkpoint(self) -> dict | None:
+        """Drop the latest checkpoint and return the one before it to restore to, or None."""
         if len(self.checkpoints) < 2:
             return None
-
-        # Pop the latest checkpoint
         self.checkpoints.pop()
-
-        # Return the new latest checkpoint (the one to restore to)
-        return self.checkpoints[-1] if self.checkpoints else None
+        self.updated_at = time.time()  # Only the header changes, so the next save rewrites just that
+        return self.checkpoints[-1]
 
     def get_messages(self, mode: ReplayMode = "conversation_and_code") -> list[dict]:
         """Get messages filtered by replay mode.
@@ -108,38 +144,78 @@ class ChatSession:
 
     def save(self) -> None:
         """Persist session to disk."""
-        CHATS_DIR.mkdir(parents=True, exist_ok=True)
-        data = {
+        try:
+            _write(*self._snapshot())
+        except OSError:
+            with _pending_lock:
+                _failed.add(self.id)
+            raise
+
+    def save_later(self) -> None:
+        """Queue a snapshot for the background writer (repeated saves coalesce into one write)."""
+        global _writer
+        session_id, header, start, batch = self._snapshot()
+        snapshot = (header, start, batch)
+        with _pending_lock:
+            queued = _pending.get(session_id)  # Still unwritten: extend its batch instead
+            _pending[session_id] = _merge(queued, snapshot) if queued else snapshot
+            _idle.clear()
+            if _writer is None:
+                _writer = threading.Thread(target=_writer_loop, daemon=True)
+                _writer.start()
+        _wake.set()
+
+    def _snapshot(self) -> tuple[str, dict, int, list[dict]]:
+        """(id, header, index of the first unsaved message, unsaved messages) — marks them saved."""
+        with _pending_lock:  # After a failed write the file may be torn, so rewrite it whole
+            retry = self.id in _failed
+            _failed.discard(self.id)
+        start = self._saved if self._saved <= len(self._messages) and not retry else 0
+        batch = self._messages[start:]
+        self._saved = len(self._messages)
+        header = {
             "id": self.id,
             "title": self.title,
             "model": self.model,
             "started_at": self.started_at,
             "updated_at": self.updated_at,
-            "messages": self.messages,
-            "checkpoints": self.checkpoints,
+            "checkpoints": list(self.checkpoints),
+            "message_count": len(self._messages),  # Lets list_sessions skip the messages file
+            "user_message_count": self._user_count,
         }
-        self.path.write_text(json.dumps(data, indent=2, default=str))
+        return self.id, header, start, batch
 
     @classmethod
     def load(cls, session_id: str) -> "ChatSession":
         """Load a session from disk."""
-        path = CHATS_DIR / f"{session_id}.json"
-        if not path.exists():
+        flush()
+        path = _find(session_id)
+        if path is None:
             raise FileNotFoundError(f"Chat session not found: {session_id}")
 
-        data = json.loads(path.read_text())
+        # Parses are cached by file stat, so reopening an unchanged session skips the disk;
+        # the session gets its own copies so edits never reach the cache
+        if path.name == _HEADER:
+            data = _cached(path, _read_header)
+            messages_path = _messages_file(path.parent)
+            messages = _cached(messages_path, _read_lines) if messages_path else []
+            current = messages_path is None or messages_path.name == _MESSAGES
+        else:  # Legacy single file: rewritten in the folder layout on the next save
+            data = _cached(path, _read)
+            messages, current = data.get("messages", []), False
         session = cls(data["id"])
         session.title = data.get("title", "")
         session.model = data.get("model", "")
         session.started_at = data.get("started_at", 0)
         session.updated_at = data.get("updated_at", 0)
-        session.messages = data.get("messages", [])
-        session.checkpoints = data.get("checkpoints", [])
+        session.messages = [dict(m) for m in messages]
+        session.checkpoints = [dict(cp) for cp in data.get("checkpoints", [])]
+        if current:
+            session._saved = len(messages)  # Already on disk as-is; later saves just append
         return session
 
     def summary(self) -> dict:
         """Return a compact summary for listing."""
-        user_msgs = sum(1 for m in self.messages if m["role"] == "user")
         return {
             "id": self.id,
             "title": self.title or "(untitled)",
@@ -147,32 +223,279 @@ class ChatSession:
             "started": _format_ts(self.started_at),
             "updated": _format_ts(self.updated_at),
             "messages": len(self.messages),
-            "user_messages": user_msgs,
+            "user_messages": self._user_count,
             "checkpoints": len(self.checkpoints),
         }
 
 
+# ── Background Writer ────────────────────────────────────────────────────────
+# Session saves are snapshotted on the caller's thread and serialized here, so
+# the prompt never waits on JSON encoding or disk IO.
+
+_Snapshot = tuple[dict, int, list[dict]]  # (header, start, messages to write)
+
+_pending: dict[str, _Snapshot] = {}  # id → queued snapshot
+_failed: set[str] = set()        # Sessions whose last write failed; their next snapshot is a full rewrite
+_pending_lock = threading.Lock()
+_io_lock = threading.Lock()      # Serializes pop+write so batches land in order
+_wake = threading.Event()
+_idle = threading.Event()
+_idle.set()
+_writer: threading.Thread | None = None
+
+
+def flush(timeout: float = 1.0) -> None:
+    """Wait for queued session writes; finish any leftovers synchronously after `timeout`."""
+    _wake.set()
+    if not _idle.wait(timeout):
+        _drain()
+
+
+def _writer_loop() -> None:
+    """Writer thread body: sleep until woken, then drain the queue."""
+    while True:
+        _wake.wait()
+        _wake.clear()
+        _drain()
+
+
+def _drain() -> None:
+    """Write queued snapshots until the queue is empty; failed ones are queued again for the next save."""
+    failed: dict[str, _Snapshot] = {}
+    while True:
+        with _io_lock:
+            with _pending_lock:
+                if not _pending:
+                    _pending.update(failed)
+                    _failed.update(failed)
+                    _idle.set()
+                    return
+                session_id, snapshot = _pending.popitem()
+                if session_id in failed:  # Never append past a lost batch: queue behind it
+                    failed[session_id] = _merge(failed[session_id], snapshot)
+                    continue
+            try:
+                _write(session_id, *snapshot)
+            except OSError as e:
+                ui.warning(f"Could not save chat session: {e}")
+                failed[session_id] = snapshot
+
+
+def _merge(queued: _Snapshot, newer: _Snapshot) -> _Snapshot:
+    """One queue entry covering both snapshots (a full rewrite in `newer` replaces `queued`)."""
+    header, start, batch = newer
+    if not start:
+        return newer
+    return header, queued[1], queued[2] + batch
+
+
+# ── Storage ──────────────────────────────────────────────────────────────────
+
+def _write(session_id: str, header: dict, start: int, batch: list[dict]) -> None:
+    """Append `batch` to the messages file (recreating it when `start` is 0), then rewrite the header."""
+    folder = CHATS_DIR / session_id
+    folder.mkdir(parents=True, exist_ok=True)
+    messages, end = folder / _MESSAGES, None
+    try:
+        if batch or not start:
+            raw = b"".join(map(_dumps_line, batch))
+            if zstandard is not None:  # zstd frames concatenate, so each append is its own frame
+                raw = zstandard.ZstdCompressor(level=1).compress(raw)
+            with open(messages, "ab" if start else "wb") as f:
+                end = f.tell()
+                f.write(raw)
+        (folder / _HEADER).write_bytes(_dumps(header))
+    except OSError:
+        if start and end is not None:  # Cut off the partial append so a retry can append again
+            os.truncate(messages, end)
+        raise
+    if not start:  # Fresh copy: drop the other-format and legacy single-file copies
+        for name in _MESSAGE_FILES:
+            if name != _MESSAGES:
+                (folder / name).unlink(missing_ok=True)
+        for suffix in _LEGACY_SUFFIXES:
+            (CHATS_DIR / f"{session_id}{suffix}").unlink(missing_ok=True)
+
+
+def _read_bytes(path: Path) -> bytes:
+    """Raw file contents, decompressing every frame of a .zst (ValueError if zstandard is missing)."""
+    if path.suffix != ".zst":
+        return path.read_bytes()
+    if zstandard is None:
+        raise ValueError(f"{path.name} is zstd-compressed; pip install zstandard to read it")
+    try:
+        with path.open("rb") as f:
+            return zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True).read()
+    except zstandard.ZstdError as e:
+        error = e
+    # Keep the frames before a torn or corrupt one (an interrupted append only damages the tail)
+    data, frames = path.read_bytes(), []
+    while data:
+        d = zstandard.ZstdDecompressor().decompressobj()
+        try:
+            frames.append(d.decompress(data))
+        except zstandard.ZstdError:
+            break
+        if not d.eof:
+            break
+        data = d.unused_data
+    if not frames:
+        raise ValueError(f"Corrupt session file {path.name}: {error}") from error
+    return b"".join(frames)
+
+
+def _read(path: Path) -> dict:
+    """Load a legacy single-file session."""
+    return _loads(_read_bytes(path))
+
+
+def _messages_file(folder: Path) -> Path | None:
+    """A session folder's messages file, in whichever format it was written, or None."""
+    for name in _MESSAGE_FILES:
+        path = folder / name
+        if path.exists():
+            return path
+    return None
+
+
+def _read_header(path: Path) -> dict:
+    """Load a session folder's header.json."""
+    return _loads(path.read_bytes())
+
+
+def _read_lines(path: Path) -> list[dict]:
+    """Load a messages.jsonl(.zst) file, one message per line."""
+    messages = []
+    for line in _read_bytes(path).splitlines():
+        try:
+            messages.append(_loads(line))
+        except ValueError:
+            pass  # Blank or torn line from an interrupted append
+    return messages
+
+
+def _cached(path: Path, parse):
+    """parse(path), reused while the file's mtime and size are unchanged."""
+    st = path.stat()
+    return _parse_cached(path, st.st_mtime_ns, st.st_size, parse)
+
+
+@lru_cache(maxsize=64)
+def _parse_cached(path: Path, mtime_ns: int, size: int, parse):
+    """Cache slot for _cached (a rewritten file changes the key, so stale entries just age out)."""
+    return parse(path)
+
+
+def _scan_messages(folder: Path, needle: bytes | None):
+    """Yield a session folder's messages, parsing only lines whose lowercased bytes contain `needle`."""
+    path = _messages_file(folder)
+    if path is None:
+        return
+    raw = _read_bytes(path)
+    if needle is not None and needle not in raw.lower():
+        return
+    for line in raw.splitlines():
+        if line and (needle is None or needle in line.lower()):
+            try:
+                yield _loads(line)
+            except ValueError:
+                pass  # Torn line from an interrupted append
+
+
+def _count_messages(folder: Path) -> int:
+    """Number of messages in a session folder (one per line)."""
+    path = _messages_file(folder)
+    return _read_bytes(path).count(b"\n") if path is not None else 0
+
+
+# Top-level scalar fields of a legacy file; all of them precede its "messages" array
+_LEGACY_FIELD_RE = re.compile(rb'"(id|title|model|started_at|updated_at)":\s*("(?:[^"\\]|\\.)*"|[-+.\deE]+)')
+
+
+def _legacy_fields(raw: bytes) -> dict:
+    """Pick a legacy file's top-level scalars from its first 4 KB without parsing the rest."""
+    head = raw[:4096]
+    end = head.find(b'"messages"')
+    matches = _LEGACY_FIELD_RE.finditer(head, 0, end if end != -1 else len(head))
+    return {m[1].decode(): _loads(m[2]) for m in matches}
+
+
+def _legacy_summary(raw: bytes) -> tuple[dict, int, int]:
+    """(metadata, message count, checkpoint count) of a legacy file without parsing its messages.
+
+    The counts tally keys only messages ("role") and checkpoints ("message_index")
+    have, which string contents can't fake unescaped.
+    """
+    fields = _legacy_fields(raw)
+    if len(fields) < 5:  # Unusual layout or a huge title: parse it all
+        data = _loads(raw)
+        return data, len(data.get("messages", [])), len(data.get("checkpoints", []))
+    return fields, raw.count(b'"role":'), raw.count(b'"message_index":')
+
+
+def _legacy_messages(raw: bytes, data: dict):
+    """Yield a legacy file's messages, parsing the whole file only once they're asked for."""
+    yield from (data if "messages" in data else _loads(raw)).get("messages", [])
+
+
+def _find(session_id: str) -> Path | None:
+    """Header of a saved session, or its legacy single file, or None."""
+    header = CHATS_DIR / session_id / _HEADER
+    if header.exists():
+        return header
+    for suffix in _LEGACY_SUFFIXES:
+        path = CHATS_DIR / f"{session_id}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def _session_files() -> list[Path]:
+    """Headers of all saved sessions plus any legacy single files (each one rewritten on every save)."""
+    files = list(CHATS_DIR.glob(f"*/{_HEADER}"))
+    files += [f for suffix in _LEGACY_SUFFIXES for f in CHATS_DIR.glob(f"*{suffix}")]
+    return files
+
+
+def _file_id(path: Path) -> str:
+    """Session ID from a header or legacy file path."""
+    if path.name == _HEADER:
+        return path.parent.name
+    return path.name.removesuffix(".zst").removesuffix(".json")
+
+
+atexit.register(flush)
+
+
 # ── History Manager ──────────────────────────────────────────────────────────
 
 def list_sessions(limit: int = 20) -> list[dict]:
     """List all saved chat sessions, newest first."""
+    flush()
     if not CHATS_DIR.exists():
         return []
 
     sessions = []
-    for f in sorted(CHATS_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
+    for f in sorted(_session_files(), key=lambda p: p.stat().st_mtime, reverse=True):
         try:
-            data = json.loads(f.read_text())
+            if f.name == _HEADER:
+                data = _cached(f, _read_header)
+                count = data.get("message_count")
+                if count is None:
+                    count = _count_messages(f.parent)
+                checkpoints = len(data.get("checkpoints", []))
+            else:
+                data, count, checkpoints = _legacy_summary(_read_bytes(f))
             sessions.append({
-                "id": data.get("id", f.stem),
+                "id": data.get("id", _file_id(f)),
                 "title": data.get("title", "(untitled)")[:60],
                 "model": data.get("model", "?"),
                 "started": _format_ts(data.get("started_at", 0)),
                 "updated": _format_ts(data.get("updated_at", 0)),
-                "messages": len(data.get("messages", [])),
-                "checkpoints": len(data.get("checkpoints", [])),
+                "messages": count,
+                "checkpoints": checkpoints,
             })
-        except (json.JSONDecodeError, KeyError):
+        except (OSError, ValueError, KeyError):
             continue
 
         if len(sessions) >= limit:
@@ -182,44 +505,64 @@ def list_sessions(limit: int = 20) -> list[dict]:
 
 
 def delete_session(session_id: str) -> bool:
-    """Delete a chat session file."""
-    path = CHATS_DIR / f"{session_id}.json"
-    if path.exists():
+    """Delete a chat session (its folder, or a legacy single file)."""
+    flush()
+    path = _find(session_id)
+    if path is None:
+        return False
+    if path.name == _HEADER:
+        shutil.rmtree(path.parent)
+    else:
         path.unlink()
-        return True
-    return False
+    return True
 
 
 def search_sessions(query: str) -> list[dict]:
     """Search sessions by title or content."""
+    flush()
     query_lower = query.lower()
     results = []
     if not CHATS_DIR.exists():
         return results
 
-    for f in CHATS_DIR.glob("*.json"):
+    # JSON stores a plain ASCII query byte-for-byte, so raw bytes lacking it can't match and
+    # are skipped unparsed (anything else may be escaped on disk, so then everything is parsed)
+    plain = query_lower.isascii() and query_lower.isprintable() and not any(c in query_lower for c in '"\\')
+    needle = query_lower.encode() if plain else None
+
+    for f in _session_files():
         try:
-            data = json.loads(f.read_text())
+            if f.name == _HEADER:
+                data = _cached(f, _read_header)
+                messages = _scan_messages(f.parent, needle)  # Lazy: untouched on a title hit
+            else:
+                raw = _read_bytes(f)
+                if needle is not None and needle not in raw.lower():
+                    continue  # Neither the title nor any message can match
+                data = _legacy_fields(raw)  # Enough for a title hit
+                if "title" not in data:
+                    data = _loads(raw)
+                messages = _legacy_messages(raw, data)
             title = data.get("title", "")
             # Search title
             if query_lower in title.lower():
                 results.append({
-                    "id": data.get("id", f.stem),
+                    "id": data.get("id", _file_id(f)),
                     "title": title[:60],
                     "match": "title",
                 })
                 continue
             # Search messages
-            for msg in data.get("messages", []):
+            for msg in messages:
                 content = msg.get("content", "")
                 if query_lower in content.lower():
                     results.append({
-                        "id": data.get("id", f.stem),
+                        "id": data.get("id", _file_id(f)),
                         "title": title[:60],
                         "match": f"message: {content[:50]}...",
                     })
                     break
-        except (json.JSONDecodeError, KeyError):
+        except (OSError, ValueError, KeyError):
             continue
 
     return results
@@ -229,8 +572,6 @@ def search_sessions(query: str) -> list[dict]:
 
 def show_chat_list(sessions: list[dict]) -> None:
     """Display chat sessions in a beautiful table."""
-    from rich.table import Table
-
     table = Table(
         title="[bold bright_cyan]💬 Chat History[/]",
         border_style="#3b4261",
@@ -262,9 +603,6 @@ def show_chat_list(sessions: list[dict]) -> None:
 
 def show_chat_detail(session: ChatSession, mode: ReplayMode = "conversation_only") -> None:
     """Display a single chat session's messages."""
-    from rich.panel import Panel
-    from rich.markdown import Markdown
-    from rich.text import Text
 
     # Header
     header = Text()
@@ -301,7 +639,10 @@ def show_chat_detail(session: ChatSession, mode: ReplayMode = "conversation_only
         elif role == "assistant":
             ui.console.print(f"\n  [bold #bb9af7]◆ Assistant[/] [dim]{ts}[/]")
             try:
-                ui.console.print(Markdown(content))
+                if "\n" in content or not _MARKDOWN_CHARS.isdisjoint(content):
+                    ui.console.print(Markdown(content))
+                else:  # One plain line renders the same without the Markdown parser
+                    ui.console.print(Text(content))
             except Exception:
                 ui.console.print(f"  {content}")
         elif role == "tool" and mode == "conversation_and_code":
@@ -313,7 +654,6 @@ def show_chat_detail(session: ChatSession, mode: ReplayMode = "conversation_only
 
     # Show checkpoints for this chat
     if session.checkpoints:
-        from rich.table import Table
         cp_table = Table(
             title="[bold #bb9af7]🔖 Chat Checkpoints[/]",
             border_style="#3b4261",
@@ -340,8 +680,6 @@ def show_chat_detail(session: ChatSession, mode: ReplayMode = "conversation_only
 
 def show_chat_checkpoints(session: ChatSession) -> None:
     """Display only the checkpoints for a chat session."""
-    from rich.table import Table
-
     if not session.checkpoints:
         ui.info("No checkpoints in this chat session.")
         return
@@ -373,6 +711,27 @@ def show_chat_checkpoints(session: ChatSession) -> None:
 
 # ── Helpers ──────────────────────────────────────────────────────────────────
 
+def _dumps(data: dict) -> bytes:
+    """Serialize to indented JSON bytes, via orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, default=str).encode()
+
+
+def _dumps_line(data: dict) -> bytes:
+    """Serialize to one compact JSON line, via orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(data, default=str, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=str).encode() + b"\n"
+
+
+def _loads(raw: bytes):
+    """Parse JSON bytes, via orjson when installed (its errors subclass json.JSONDecodeError)."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
 def _new_id() -> str:
     """Generate a short, readable session ID."""
     return datetime.now().strftime("%Y%m%d_%H%M%S") + "_" + uuid.uuid4().hex[:6]
@@ -383,13 +742,18 @@ def _format_ts(ts: float) -> str:
     if not ts:
         return "—"
     try:
-        dt = datetime.fromtimestamp(ts)
-        now = datetime.now()
-        if dt.date() == now.date():
-            return dt.strftime("%H:%M:%S")
-        elif (now - dt).days < 7:
-            return dt.strftime("%a %H:%M")
+        now = time.time()
+        if time.localtime(ts)[:3] == time.localtime(now)[:3]:
+            return _strftime(int(ts), "%H:%M:%S")
+        elif now - ts < 7 * 86400:
+            return _strftime(int(ts), "%a %H:%M")
         else:
-            return dt.strftime("%Y-%m-%d %H:%M")
-    except (ValueError, OSError):
+            return _strftime(int(ts), "%Y-%m-%d %H:%M")
+    except (ValueError, OSError, OverflowError):
         return "—"
+
+
+@lru_cache(maxsize=1024)
+def _strftime(ts: int, fmt: str) -> str:
+    """strftime for a whole-second timestamp; a render repeats the same ones (messages, checkpoints)."""
+    return datetime.fromtimestamp(ts).strftime(fmt)
@@ -1,4 +1,6 @@
 """LiteLLM wrapper — one function for all providers."""
+import io
+import re
 import time
 import litellm
 
@@ -8,6 +10,7 @@ from amas_code import ui
 litellm.suppress_debug_info = True
 
 _RETRYABLE = ("503", "429", "overloaded", "unavailable", "rate limit", "high demand", "disconnected", "apiconnectionerror", "connection reset", "connection error")
+_RETRYABLE_RE = re.compile("|".join(map(re.escape, _RETRYABLE)))  # One scan of the error text for all markers
 _MAX_RETRIES = 10
 
 
@@ -43,8 +46,7 @@ def complete(messages: list[dict], tools: list[dict] | None, config: dict, on_ch
             response = litellm.completion(**kwargs)
             break
         except Exception as e:
-            err_str = str(e).lower()
-            if attempt < _MAX_RETRIES - 1 and any(k in err_str for k in _RETRYABLE):
+            if attempt < _MAX_RETRIES - 1 and _is_retryable(e):
                 ui.warning(f"API error (attempt {attempt + 1}/{_MAX_RETRIES}), retrying in 5s…")
                 time.sleep(5)
             else:
@@ -61,7 +63,7 @@ def complete(messages: list[dict], tools: list[dict] | None, config: dict, on_ch
 def _stream(response, kwargs: dict, on_chunk) -> dict:
     """Consume a streaming response, retrying on transient errors (non-recursive)."""
     for attempt in range(_MAX_RETRIES):
-        content_parts = []
+        content_buf = io.StringIO()  # Grows in place in C; no list of chunk strings to join
         tool_calls_map = {}
 
         try:
@@ -71,27 +73,28 @@ def _stream(response, kwargs: dict, on_chunk) -> dict:
                     continue
 
                 if delta.content:
-                    content_parts.append(delta.content)
+                    content_buf.write(delta.content)
                     if on_chunk:
                         on_chunk(delta.content)
 
                 if hasattr(delta, "tool_calls") and delta.tool_calls:
                     for tc in delta.tool_calls:
                         idx = tc.index if (hasattr(tc, "index") and tc.index is not None) else 0
-                        if idx not in tool_calls_map:
-                            tool_calls_map[idx] = {
+                        entry = tool_calls_map.get(idx)
+                        if entry is None:
+                            # "arguments" collects chunk strings while streaming; joined once at the end
+                            entry = tool_calls_map[idx] = {
                                 "id": getattr(tc, "id", "") or "",
                                 "type": "function",
-                                "function": {"name": "", "arguments": ""},
+                                "function": {"name": "", "arguments": []},
                             }
-                        entry = tool_calls_map[idx]
                         if tc.id:
                             entry["id"] = tc.id
                         if hasattr(tc, "function") and tc.function:
                             if tc.function.name:
                                 entry["function"]["name"] = tc.function.name
                             if tc.function.arguments:
-                                entry["function"]["arguments"] += tc.function.arguments
+                                entry["function"]["arguments"].append(tc.function.arguments)
             break  # Stream completed successfully
 
         except KeyboardInterrupt:
@@ -99,10 +102,8 @@ def _stream(response, kwargs: dict, on_chunk) -> dict:
             break
 
         except Exception as e:
-            err_str = str(e).lower()
-            is_retryable = any(k in err_str for k in _RETRYABLE)
             # Only retry if nothing printed yet — avoids duplicate output
-            if is_retryable and not content_parts and not tool_calls_map and attempt < _MAX_RETRIES - 1:
+            if _is_retryable(e) and not content_buf.tell() and not tool_calls_map and attempt < _MAX_RETRIES - 1:
                 ui.warning(f"Streaming error, retrying in 5s… ({attempt + 1}/{_MAX_RETRIES - 1})")
                 time.sleep(5)
                 try:
@@ -113,7 +114,14 @@ def _stream(response, kwargs: dict, on_chunk) -> dict:
             ui.error(f"Streaming error: {e}")
             break
 
-    result = {"role": "assistant", "content": "".join(content_parts)}
+    result = {"role": "assistant", "content": content_buf.getvalue()}
     if tool_calls_map:
+        for entry in tool_calls_map.values():
+            entry["function"]["arguments"] = "".join(entry["function"]["arguments"])
         result["tool_calls"] = [tool_calls_map[i] for i in sorted(tool_calls_map)]
     return result
+
+
+def _is_retryable(e: Exception) -> bool:
+    """Whether an API error looks transient (overload, rate limit, dropped connection)."""
+    return _RETRYABLE_RE.search(str(e).lower()) is not None
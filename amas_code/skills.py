@@ -1,37 +1,62 @@
 """Skills + rules loader, and project init scanner."""
+import hashlib
+import heapq
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Iterator
 
 from amas_code import ui
+from amas_code.config import compile_ignore
 
 
 def load_rules(path: str = ".amas/rules.md") -> str:
     """Load project rules from .amas/rules.md."""
-    p = Path(path)
-    if p.exists():
-        return p.read_text(encoding="utf-8").strip()
-    return ""
+    try:  # Open directly instead of exists() + read: one syscall fewer when present
+        with open(path, encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
 
 
 def load_skills(path: str = ".amas/skills/") -> dict[str, str]:
     """Load all skill markdown files from .amas/skills/."""
-    skills = {}
     p = Path(path)
-    if p.exists() and p.is_dir():
-        for f in sorted(p.glob("*.md")):
-            skills[f.stem] = f.read_text(encoding="utf-8").strip()
-    return skills
+    if not p.is_dir():
+        return {}
+    files = sorted(p.glob("*.md"))
+    return dict(zip((f.stem for f in files), _read_all(files)))
 
 
 def load_lessons(path: str = ".amas/lessons/") -> dict[str, str]:
     """Load all lesson markdown files from .amas/lessons/."""
-    lessons = {}
-    p = Path(path)
-    if p.exists() and p.is_dir():
-        # Only load the last 20 lessons to keep prompt size manageable
-        files = sorted(p.glob("*.md"), key=lambda x: x.stat().st_mtime, reverse=True)[:20]
-        for f in reversed(files):
-            lessons[f.stem] = f.read_text(encoding="utf-8").strip()
-    return lessons
+    try:
+        with os.scandir(path) as it:
+            entries = [e for e in it if e.name.endswith(".md") and e.is_file()]
+    except OSError:
+        return {}
+    # Only load the last 20 lessons to keep prompt size manageable; DirEntry.stat() is cached
+    newest = heapq.nlargest(20, entries, key=lambda e: e.stat().st_mtime)[::-1]
+    return dict(zip((e.name[:-3] for e in newest), _read_all([e.path for e in newest])))
+
+
+def _read_all(paths: list) -> list[str]:
+    """Read and strip several markdown files, overlapping the reads (slow or cold filesystems)."""
+    if len(paths) < 2:
+        return [_read_stripped(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=8) as ex:  # map keeps the input order
+        return list(ex.map(_read_stripped, paths))
+
+
+def _read_stripped(path) -> str:
+    """One markdown file's text, stripped."""
+    with open(path, encoding="utf-8") as f:
+        return f.read().strip()
 
 
 
@@ -41,28 +66,35 @@ def init_project(path: str = ".", config: dict | None = None) -> str:
     Uses tree-sitter if available, falls back to basic file listing.
     """
     root = Path(path).resolve()
-    ignore = set((config or {}).get("ignore", [
-        "node_modules", "__pycache__", ".git", "*.pyc", "dist", "build", ".venv", ".amas",
-    ]))
+    rules = _ignore_rules(config)
 
     ui.info("Scanning project structure...")
 
     # Collect source files
-    source_files = []
-    _collect_files(root, source_files, ignore, root, max_depth=5)
+    source_files, truncated = _collect_files(root, rules)
 
     if not source_files:
         return "Empty project — no source files found."
 
+    # Unchanged since the last scan in this session: reuse the map
+    memo_key = ("init", str(root), rules)
+    fingerprint = (_fingerprint(root, source_files), truncated)
+    memo = _scan_memo.get(memo_key)
+    if memo and memo[0] == fingerprint:
+        ui.success(memo[2])
+        return memo[1]
+
+    # Try tree-sitter extraction for function/class signatures
+    extractions = _extract_symbols(root, source_files)
+
     # Build file tree
-    lines = [f"**Project: {root.name}** ({len(source_files)} files)\n"]
+    count = f"{len(source_files)}+ files (truncated)" if truncated else f"{len(source_files)} files"
+    lines = [f"**Project: {root.name}** — {count}\n" if truncated else f"**Project: {root.name}** ({count})\n"]
     lines.append("```")
-    for rel_path in sorted(source_files):
+    for rel_path in source_files:
         lines.append(f"  {rel_path}")
     lines.append("```\n")
 
-    # Try tree-sitter extraction for function/class signatures
-    extractions = _extract_symbols(root, source_files)
     if extractions:
         lines.append("**Key symbols:**\n```")
         for item in extractions[:100]:  # Cap at 100 symbols
@@ -75,44 +107,129 @@ def init_project(path: str = ".", config: dict | None = None) -> str:
     if len(result) > 6000:
         result = result[:6000] + "\n\n[project map truncated — too many files]"
 
-    ui.success(f"Scanned {len(source_files)} files, {len(extractions)} symbols extracted.")
+    message = f"Scanned {count}, {len(extractions)} symbols extracted."
+    _scan_memo[memo_key] = (fingerprint, result, message)
+    ui.success(message)
     return result
 
 
-def _collect_files(p: Path, out: list, ignore: set, root: Path, max_depth: int, depth: int = 0) -> None:
-    """Recursively collect source file paths."""
-    if depth > max_depth:
-        return
+# (scanner, root, ignore rules) → (fingerprint, result, ...) of the last scan in this process
+_scan_memo: dict[tuple, tuple] = {}
+
+
+def _fingerprint(root: Path, files: list[str]) -> bytes:
+    """Digest of each file's path, mtime and size, so any add, remove, rename or edit changes it."""
+    h = hashlib.blake2b(digest_size=16)
+    top = str(root)
+    for rel_path in files:
+        try:
+            st = os.stat(os.path.join(top, rel_path))
+        except OSError:
+            continue
+        h.update(f"{rel_path}\0{st.st_mtime_ns}\0{st.st_size}\n".encode())
+    return h.digest()
+
+
+_DEFAULT_IGNORE = ("node_modules", "__pycache__", ".git", "*.pyc", "dist", "build", ".venv", ".amas")
+
+
+def _ignore_rules(config: dict | None) -> tuple:
+    """Compiled (exact names, glob regex) for the config's ignore list; compile_ignore caches per list."""
+    return compile_ignore(tuple(sorted(set((config or {}).get("ignore", _DEFAULT_IGNORE)))))
+
+
+_MAX_FILES = 2000  # Walk cap, so a monorepo isn't listed to the end for a map that's truncated anyway
+
+# (root, ignore rules) → ({walked dir: mtime_ns}, (sorted source files, truncated)) of the last walk in this process
+_walk_memo: dict[tuple, tuple[dict[str, int], tuple[list[str], bool]]] = {}
+
+
+def _collect_files(root: Path, rules: tuple) -> tuple[list[str], bool]:
+    """(sorted source relpaths under `root` up to depth 5, whether the cap cut the walk short).
+
+    Reuses the last walk while it's still valid: adding, removing or renaming an entry bumps its
+    directory's mtime, so one stat per walked directory stands in for relisting them all;
+    /init's summary and map share a single walk. Callers must not mutate the returned list.
+    """
+    key = (str(root), rules)
+    memo = _walk_memo.get(key)
+    if memo and all(_dir_mtime(d) == m for d, m in memo[0].items()):
+        return memo[1]
+    dirs: dict[str, int] = {}
+    files = list(_iter_files(root, rules, max_depth=5, max_files=_MAX_FILES + 1, dirs=dirs))
+    truncated = len(files) > _MAX_FILES
+    result = sorted(files[:_MAX_FILES]), truncated  # Walk order isn't full-path order
+    if dirs:  # Nothing to validate against if the root couldn't be listed
+        _walk_memo[key] = (dirs, result)
+    return result
+
+
+def _dir_mtime(path: str) -> int | None:
+    """Directory mtime in ns (None if it's gone)."""
     try:
-        for entry in sorted(p.iterdir()):
-            if entry.name in ignore or entry.name.startswith("."):
-                continue
-            if any(entry.match(ig) for ig in ignore):
-                continue
-            if entry.is_dir():
-                _collect_files(entry, out, ignore, root, max_depth, depth + 1)
-            elif entry.is_file() and _is_source_file(entry):
-                try:
-                    out.append(str(entry.relative_to(root)))
-                except ValueError:
-                    out.append(str(entry))
-    except PermissionError:
-        pass
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
 
+def _iter_files(root: Path, rules: tuple, max_depth: int, max_files: int = _MAX_FILES,
+                dirs: dict[str, int] | None = None) -> Iterator[str]:
+    """Yield source file paths relative to `root`, stopping after `max_files`.
 
-def _is_source_file(p: Path) -> bool:
-    """Check if a file is a source code file worth scanning."""
-    source_exts = {
-        ".py", ".js", ".ts", ".jsx", ".tsx", ".rs", ".go", ".c", ".h", ".cpp", ".hpp",
-        ".java", ".kt", ".rb", ".php", ".swift", ".m", ".cs", ".lua", ".sh", ".bash",
-        ".yaml", ".yml", ".toml", ".json", ".md", ".html", ".css", ".sql", ".r",
-        ".scala", ".clj", ".ex", ".exs", ".hs", ".ml", ".vue", ".svelte",
-    }
-    return p.suffix.lower() in source_exts
+    The walk is breadth-first, so a cap cuts the deepest directories and never the
+    root or shallow files such as entry points. Each listed directory's mtime is
+    recorded in `dirs` when given.
+    """
+    return islice(_scan_tree(str(root), rules, max_depth, dirs), max_files)
+
+
+def _scan_tree(top: str, rules: tuple, max_depth: int, dirs: dict[str, int] | None) -> Iterator[str]:
+    """Walk level by level on plain path strings; relpaths are slices past the root prefix."""
+    prefix_len = len(os.path.join(top, ""))
+    exact, glob_re = rules
+    level = [top]
+    for _ in range(max_depth + 1):
+        subdirs = []
+        for path in level:
+            try:
+                if dirs is not None:
+                    dirs[path] = os.stat(path).st_mtime_ns  # Taken before listing, so a concurrent change isn't missed
+                # scandir's DirEntry answers is_dir/is_file from the directory listing, without a stat per entry.
+                # Sorted per directory, since OS order varies by filesystem and decides which files the cap keeps.
+                with os.scandir(path) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                continue
+            for entry in entries:
+                name = entry.name
+                if name.startswith(".") or name in exact or (glob_re and glob_re.match(name)):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                else:
+                    dot = name.rfind(".")  # Plain string slicing: no splitext/Path per entry
+                    if dot > 0 and name[dot:].lower() in _SOURCE_EXTS and entry.is_file():
+                        yield entry.path[prefix_len:]
+        if not subdirs:
+            return
+        level = subdirs
+
+
+_SOURCE_EXTS = frozenset({
+    ".py", ".js", ".ts", ".jsx", ".tsx", ".rs", ".go", ".c", ".h", ".cpp", ".hpp",
+    ".java", ".kt", ".rb", ".php", ".swift", ".m", ".cs", ".lua", ".sh", ".bash",
+    ".yaml", ".yml", ".toml", ".json", ".md", ".html", ".css", ".sql", ".r",
+    ".scala", ".clj", ".ex", ".exs", ".hs", ".ml", ".vue", ".svelte",
+})
 
 
 # ── Tree-sitter symbol extraction (lazy-loaded) ─────────────────────────────
 
+SYMBOL_CACHE = ".amas/symbol_cache.json"  # Relative to the scanned project root
+_SYMBOL_CACHE_VERSION = 1
+_PARSE_TIMEOUT_MICROS = 100_000  # Per file, so one pathological file can't stall the scan
+_MAX_PARSE_BYTES = 256 * 1024  # Larger files skip tree-sitter entirely
+
 _LANG_MAP = {
     ".py": "python", ".js": "javascript", ".ts": "typescript", ".tsx": "tsx",
     ".jsx": "javascript", ".rs": "rust", ".go": "go", ".c": "c", ".cpp": "cpp",
@@ -122,80 +239,208 @@ _LANG_MAP = {
 }
 
 
-def _extract_symbols(root: Path, files: list[str]) -> list[str]:
+def _extract_symbols(root: Path, files: Iterable[str]) -> list[str]:
     """Extract function/class names using tree-sitter (if available)."""
-    try:
-        from tree_sitter_languages import get_parser  # Lazy import!
-    except ImportError:
+    if not _ts_available():
         ui.info("[dim]tree-sitter not installed — skipping symbol extraction. Install with: pip install tree-sitter-languages[/]")
         return _extract_symbols_basic(root, files)
-
-    symbols = []
-    for rel_path in files:
-        p = root / rel_path
-        ext = p.suffix.lower()
-        lang = _LANG_MAP.get(ext)
-        if not lang:
-            continue
-
+    from tree_sitter import Parser
+
+    # Plain string joins and splits per file, no Path objects
+    top = str(root)
+    jobs = ((rel_path, lang) for rel_path in files if (lang := _LANG_MAP.get(os.path.splitext(rel_path)[1].lower())))
+    local = threading.local()  # Parsers aren't safe to share across threads: one per thread and language
+    cache = _load_symbol_cache(root)
+    fresh: dict[str, list] = {}
+
+    def parse_one(job: tuple[str, str]) -> list[str]:
+        rel_path, lang = job
+        p = os.path.join(top, rel_path)
         try:
-            parser = get_parser(lang)
-            code = p.read_bytes()
-            tree = parser.parse(code)
-            _walk_tree_sitter(tree.root_node, rel_path, symbols)
+            st = os.stat(p)
+        except OSError:
+            return []
+        key = [st.st_mtime_ns, st.st_size]
+        hit = cache.get(rel_path)
+        if hit and hit[:2] == key:  # Unchanged since the last scan: no read, no parse
+            fresh[rel_path] = hit
+            return hit[2]
+
+        if st.st_size > _MAX_PARSE_BYTES:  # Bundles and generated files: a head-only regex scan will do
+            found = _extract_symbols_basic(root, [rel_path])
+            fresh[rel_path] = [*key, found]
+            return found
+
+        found = []
+        try:
+            parsers = local.__dict__.setdefault("parsers", {})
+            parser = parsers.get(lang)
+            if parser is None:
+                parser = parsers[lang] = Parser()
+                parser.set_language(_ts_language(lang))
+                parser.set_timeout_micros(_PARSE_TIMEOUT_MICROS)
+            with open(p, "rb") as f:
+                code = f.read()
+            try:
+                tree = parser.parse(code)
+            except ValueError:  # Over the time budget: reset so the next file starts clean, use the regex scan
+                parser.reset()
+                found = _extract_symbols_basic(root, [rel_path])
+                fresh[rel_path] = [*key, found]
+                return found
+            query = _ts_query(lang)
+            if query is not None:
+                _query_symbols(query, tree.root_node, rel_path, found)
+            else:
+                _walk_tree_sitter(tree.root_node, rel_path, found)
+            fresh[rel_path] = [*key, found]
         except Exception:
-            continue  # Skip files that fail to parse
+            pass  # Skip files that fail to parse
+        return found
 
+    # Reads and parses run in C, so files are handled in parallel; map keeps file order
+    symbols = []
+    with ThreadPoolExecutor(max_workers=min(32, os.cpu_count() or 1)) as ex:
+        for found in ex.map(parse_one, jobs):
+            symbols.extend(found)
+    if fresh != cache:
+        _save_symbol_cache(root, fresh)
     return symbols
 
 
+@lru_cache(maxsize=1)
+def _ts_available() -> bool:
+    """Whether tree-sitter is installed (the import is only attempted once per process)."""
+    try:
+        import tree_sitter_languages  # noqa: F401  Lazy import!
+    except ImportError:
+        return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def _ts_language(lang: str):
+    """Loaded tree-sitter Language for `lang`, shared by every thread's parser."""
+    from tree_sitter_languages import get_language
+    return get_language(lang)
+
+
+@lru_cache(maxsize=None)
+def _ts_query(lang: str):
+    """Query capturing the declaration node types `lang`'s grammar defines (None if it has none)."""
+    language = _ts_language(lang)
+    kinds = {language.node_kind_for_id(i) for i in range(language.node_kind_count)}
+    patterns = [f"({k}) @fn" for k in sorted(_FN_TYPES & kinds)] + [f"({k}) @cls" for k in sorted(_CLS_TYPES & kinds)]
+    try:
+        return language.query(" ".join(patterns)) if patterns else None
+    except Exception:
+        return None  # Fall back to the Python walk
+
+
+def _load_symbol_cache(root: Path) -> dict[str, list]:
+    """rel_path → [mtime_ns, size, symbols] from the last scan (empty if missing or corrupt)."""
+    try:
+        data = json.loads((root / SYMBOL_CACHE).read_text(encoding="utf-8"))
+        if data.get("version") == _SYMBOL_CACHE_VERSION:
+            return data["files"]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass
+    return {}
+
+
+def _save_symbol_cache(root: Path, files: dict[str, list]) -> None:
+    """Persist per-file symbols (never fail a scan over a cache write)."""
+    try:
+        path = root / SYMBOL_CACHE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"version": _SYMBOL_CACHE_VERSION, "files": files}), encoding="utf-8")
+    except OSError:
+        pass
+
+
+# Node types that indicate function/class declarations across languages
+_FN_TYPES = frozenset({"function_definition", "function_declaration", "method_definition", "method_declaration"})
+_CLS_TYPES = frozenset({"class_definition", "class_declaration", "struct_item", "impl_item"})
+_NAME_TYPES = frozenset({"identifier", "name", "type_identifier"})
+# Leaf-like subtrees that can never contain a declaration, so the walk doesn't enter them
+_SKIP_TYPES = frozenset({"comment", "line_comment", "block_comment", "string", "string_literal", "raw_string_literal"})
+
+
 def _walk_tree_sitter(node, file_path: str, symbols: list) -> None:
-    """Walk tree-sitter AST and extract function/class declarations."""
-    # Node types that indicate function/class declarations across languages
-    fn_types = {"function_definition", "function_declaration", "method_definition", "method_declaration"}
-    cls_types = {"class_definition", "class_declaration", "struct_item", "impl_item"}
+    """Walk tree-sitter AST and extract function/class declarations.
 
-    if node.type in fn_types:
-        name = _get_name_child(node)
-        if name:
-            symbols.append(f"{file_path}: fn {name}()")
-    elif node.type in cls_types:
-        name = _get_name_child(node)
-        if name:
-            symbols.append(f"{file_path}: class {name}")
+    Uses a TreeCursor, so there's no Python recursion and no per-node children list.
+    """
+    cursor = node.walk()
+    while True:
+        current = cursor.node  # Each .node access builds a new Node object, so take it once
+        node_type = current.type
+        if node_type in _FN_TYPES:
+            name = _get_name_child(current)
+            if name:
+                symbols.append(f"{file_path}: fn {name.decode()}()")
+        elif node_type in _CLS_TYPES:
+            name = _get_name_child(current)
+            if name:
+                symbols.append(f"{file_path}: class {name.decode()}")
+
+        if node_type not in _SKIP_TYPES and cursor.goto_first_child():
+            continue
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                return
 
-    for child in node.children:
-        _walk_tree_sitter(child, file_path, symbols)
+
+def _query_symbols(query, node, file_path: str, symbols: list) -> None:
+    """Extract declarations via a tree-sitter query: the tree is searched in C, in document order."""
+    for decl, kind in query.captures(node):
+        name = _get_name_child(decl)
+        if name:
+            name = name.decode()
+            symbols.append(f"{file_path}: fn {name}()" if kind == "fn" else f"{file_path}: class {name}")
 
 
-def _get_name_child(node) -> str | None:
-    """Get the name identifier from a declaration node."""
+def _get_name_child(node) -> bytes | None:
+    """Get the name identifier (raw source bytes) from a declaration node; callers decode what they keep."""
     for child in node.children:
-        if child.type in ("identifier", "name", "type_identifier"):
-            return child.text.decode("utf-8")
+        if child.type in _NAME_TYPES:
+            return child.text
     return None
 
 
-def _extract_symbols_basic(root: Path, files: list[str]) -> list[str]:
+# One pattern instead of three: the alternatives start with distinct keywords, so at most one fires.
+# Run with finditer over the file head; [^\S\n] is \s minus newline, so no match spans lines.
+_BASIC_SYMBOL_RE = re.compile(
+    r"^[^\S\n]*(?:"
+    r"(?:def|function|fn|func)[^\S\n]+(?P<fn>\w+)"
+    r"|(?:class|struct|impl|interface|enum)[^\S\n]+(?P<cls>\w+)"
+    r"|(?:export[^\S\n]+)?(?:const|let|var)[^\S\n]+(?P<arrow>\w+)[^\S\n]*=[^\S\n]*(?:async[^\S\n]+)?\("
+    r")",
+    re.MULTILINE,
+)
+
+_BASIC_EXTS = frozenset({".py", ".js", ".ts", ".jsx", ".tsx", ".rs", ".go", ".java", ".rb", ".php"})
+_BASIC_HEAD_BYTES = 32 * 1024  # Byte cap on the scanned head, so single-line bundles stay cheap too
+
+
+def _extract_symbols_basic(root: Path, files: Iterable[str]) -> list[str]:
     """Fallback: extract symbols using simple regex (no tree-sitter)."""
-    import re
     symbols = []
-    patterns = [
-        (re.compile(r"^\s*(?:def|function|fn|func)\s+(\w+)"), "fn"),
-        (re.compile(r"^\s*(?:class|struct|impl|interface|enum)\s+(\w+)"), "class"),
-        (re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s+)?\("), "fn"),
-    ]
+    finditer = _BASIC_SYMBOL_RE.finditer
 
+    top = str(root)
     for rel_path in files:
-        p = root / rel_path
-        if p.suffix.lower() not in {".py", ".js", ".ts", ".jsx", ".tsx", ".rs", ".go", ".java", ".rb", ".php"}:
+        if os.path.splitext(rel_path)[1].lower() not in _BASIC_EXTS:
             continue
         try:
-            for line in p.read_text(errors="ignore").splitlines()[:200]:  # First 200 lines
-                for pattern, kind in patterns:
-                    m = pattern.match(line)
-                    if m:
-                        symbols.append(f"{rel_path}: {kind} {m.group(1)}{'()' if kind == 'fn' else ''}")
+            with open(os.path.join(top, rel_path), "rb") as f:  # Only the first 200 lines are scanned
+                raw = f.read(_BASIC_HEAD_BYTES)
+            if len(raw) == _BASIC_HEAD_BYTES:  # Drop the cut-off last line unless it's the only one
+                raw = raw[:raw.rfind(b"\n") + 1] or raw
+            head = b"\n".join(raw.split(b"\n", 200)[:200]).decode(errors="ignore")
+            for m in finditer(head):
+                cls = m["cls"]
+                symbols.append(f"{rel_path}: class {cls}" if cls else f"{rel_path}: fn {m['fn'] or m['arrow']}()")
         except Exception:
             continue
 
@@ -210,15 +455,17 @@ def generate_amas_md(path: str = ".", config: dict | None = None) -> str:
     # Gather raw context from metadata files
     parts = []
     for name in ("README.md", "readme.md", "README.rst"):
-        p = root / name
-        if p.exists():
-            parts.append(f"README:\n{p.read_text(errors='ignore')[:2000]}")
+        try:
+            parts.append(f"README:\n{_read_head(root / name, 2000)}")
             break
+        except FileNotFoundError:
+            continue
     for name in ("pyproject.toml", "package.json", "setup.py", "Cargo.toml", "go.mod"):
-        p = root / name
-        if p.exists():
-            parts.append(f"{name}:\n{p.read_text(errors='ignore')[:1500]}")
+        try:
+            parts.append(f"{name}:\n{_read_head(root / name, 1500)}")
             break
+        except FileNotFoundError:
+            continue
 
     if not parts:
         return ""
@@ -243,32 +490,39 @@ def generate_project_summary(path: str = ".", config: dict | None = None) -> str
     Reads key files to understand their purpose and creates a concise map.
     """
     root = Path(path).resolve()
-    ignore = set((config or {}).get("ignore", [
-        "node_modules", "__pycache__", ".git", "*.pyc", "dist", "build", ".venv", ".amas",
-    ]))
+    rules = _ignore_rules(config)
 
     ui.info("Generating intelligent project summary...")
 
     # Collect source files
-    source_files = []
-    _collect_files(root, source_files, ignore, root, max_depth=5)
+    source_files, truncated = _collect_files(root, rules)
 
     if not source_files:
         return "Empty project — no source files found."
 
+    memo_key = ("summary", str(root), rules)
+    fingerprint = (_fingerprint(root, source_files), truncated)
+    memo = _scan_memo.get(memo_key)
+    if memo and memo[0] == fingerprint:
+        return memo[1]
+
     # Prioritize files to analyze (config, main entry points, core modules)
     priority_files = _rank_files(source_files)
 
     # Analyze top files (limit to 20 to avoid too much processing)
     summaries = []
+    top = str(root)
     for rel_path in priority_files[:20]:
-        summary = _analyze_file(root / rel_path, rel_path)
+        summary = _analyze_file(os.path.join(top, rel_path), rel_path)
         if summary:
             summaries.append(summary)
 
     # Build final map
     lines = [f"# Project: {root.name}\n"]
-    lines.append(f"**{len(source_files)} files** across the codebase.\n")
+    if truncated:
+        lines.append(f"**{len(source_files)}+ files** across the codebase (truncated).\n")
+    else:
+        lines.append(f"**{len(source_files)} files** across the codebase.\n")
     lines.append("## Key Files\n")
     lines.extend(summaries)
 
@@ -278,42 +532,41 @@ def generate_project_summary(path: str = ".", config: dict | None = None) -> str
     if len(result) > 5000:
         result = result[:5000] + "\n\n[Summary truncated for context]"
 
+    _scan_memo[memo_key] = (fingerprint, result)
     return result
 
 
+# Scores fall in key order, so the highest-scoring hit is the first indicator the old per-key loop found
+_RANK_SCORES = {
+    "main": 1000, "index": 900, "app": 800, "cli": 800, "entry": 800,
+    "core": 700, "agent": 700, "config": 600, "setup": 600,
+    "init": 500, "test": -100,  # Lower priority for tests
+}
+# Lookahead, so overlapping indicators are all found; no key prefixes another, so none hides one
+_RANK_RE = re.compile(f"(?=({'|'.join(_RANK_SCORES)}))")
+
+
 def _rank_files(files: list[str]) -> list[str]:
     """Rank files by importance (entry points, core modules first)."""
-    priority_indicators = {
-        "main": 1000, "index": 900, "app": 800, "cli": 800, "entry": 800,
-        "core": 700, "agent": 700, "config": 600, "setup": 600,
-        "init": 500, "test": -100,  # Lower priority for tests
-    }
-
     def get_priority(f: str) -> int:
-        name = Path(f).stem.lower()
-        for key, val in priority_indicators.items():
-            if key in name:
-                return val
-        return 0
+        return max(map(_RANK_SCORES.__getitem__, _RANK_RE.findall(Path(f).stem.lower())), default=0)
 
     return sorted(files, key=get_priority, reverse=True)
 
 
-def _analyze_file(path: Path, rel_path: str) -> str:
+def _analyze_file(path: str, rel_path: str) -> str:
     """Analyze a single file and return a summary."""
-    if not path.exists():
-        return ""
-
     try:
-        content = path.read_text(encoding="utf-8", errors="ignore")
+        content = _read_head(path)  # Bounded, so a multi-MB bundle or generated file isn't read whole
     except Exception:
-        return ""
+        return ""  # Missing or unreadable
+    ext = os.path.splitext(rel_path)[1]
 
     # Extract module/file docstring
-    docstring = _extract_docstring(content, path.suffix)
+    docstring = _extract_docstring(content, ext)
 
     # Extract top-level functions/classes
-    symbols = _extract_file_symbols(content, path.suffix)
+    symbols = _extract_file_symbols(content, ext)
 
     # Build summary line
     symbol_text = ", ".join(symbols[:5])  # First 5 symbols
@@ -331,46 +584,38 @@ def _analyze_file(path: Path, rel_path: str) -> str:
     return summary
 
 
-def _extract_docstring(content: str, ext: str) -> str:
-    """Extract the first docstring/comment from a file."""
-    import re
+_JS_EXTS = frozenset({".js", ".ts", ".jsx", ".tsx"})
 
-    # Python docstring ("""...""" or '''...''')
-    if ext.lower() == ".py":
-        m = re.search(r'^\s*(?:"""|\'\'\'|#)\s*(.+?)(?:\n|""")', content, re.MULTILINE)
-        if m:
-            text = m.group(1).strip()
-            return text[:100]  # First 100 chars
+# First docstring/comment: Python ("""...""", '''...''' or #) and JS/TS (/** ... */ or //)
+_DOC_RES = {
+    ".py": re.compile(r'^\s*(?:"""|\'\'\'|#)\s*(.+?)(?:\n|""")', re.MULTILINE),
+    **dict.fromkeys(_JS_EXTS, re.compile(r'^\s*(?:/\*\*|//)\s*(.+?)(?:\n|\*/)', re.MULTILINE)),
+}
 
-    # JavaScript/TypeScript docstring (/** ... */ or // comment)
-    if ext.lower() in {".js", ".ts", ".jsx", ".tsx"}:
-        m = re.search(r'^\s*(?:/\*\*|//)\s*(.+?)(?:\n|\*/)', content, re.MULTILINE)
-        if m:
-            text = m.group(1).strip()
-            return text[:100]
+# Top-level symbols: Python def/class; JS/TS function, const, class, export; Go/Rust func, type
+_SYMBOL_RES = {
+    ".py": re.compile(r"^(?:def|class)\s+(\w+)", re.MULTILINE),
+    **dict.fromkeys(_JS_EXTS, re.compile(r"(?:export\s+)?(?:async\s+)?(?:function|const|let|class)\s+(\w+)")),
+    **dict.fromkeys((".go", ".rs"), re.compile(r"(?:func|type|fn)\s+(\w+)")),
+}
 
-    return ""
 
+def _read_head(path: str | Path, n_chars: int = 256 * 1024) -> str:
+    """First `n_chars` characters of a file, without reading the rest."""
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        return f.read(n_chars)
 
-def _extract_file_symbols(content: str, ext: str) -> list[str]:
-    """Extract function and class names from file content."""
-    import re
 
-    symbols = []
-
-    if ext.lower() == ".py":
-        # Python: def and class
-        for m in re.finditer(r"^(?:def|class)\s+(\w+)", content, re.MULTILINE):
-            symbols.append(m.group(1))
-
-    elif ext.lower() in {".js", ".ts", ".jsx", ".tsx"}:
-        # JavaScript/TypeScript: function, const, class, export
-        for m in re.finditer(r"(?:export\s+)?(?:async\s+)?(?:function|const|let|class)\s+(\w+)", content, re.MULTILINE):
-            symbols.append(m.group(1))
+def _extract_docstring(content: str, ext: str) -> str:
+    """Extract the first docstring/comment from a file."""
+    pattern = _DOC_RES.get(ext.lower())
+    m = pattern.search(content) if pattern else None
+    return m.group(1).strip()[:100] if m else ""  # First 100 chars
 
-    elif ext.lower() in {".go", ".rs"}:
-        # Go/Rust: func, type
-        for m in re.finditer(r"(?:func|type|fn)\s+(\w+)", content, re.MULTILINE):
-            symbols.append(m.group(1))
 
-    return symbols[:8]  # Limit to 8 per file
+def _extract_file_symbols(content: str, ext: str) -> list[str]:
+    """Extract function and class names from file content."""
+    pattern = _SYMBOL_RES.get(ext.lower())
+    if pattern is None:
+        return []
+    return [m.group(1) for m in islice(pattern.finditer(content), 8)]  # Limit to 8 per file
@@ -1,9 +1,13 @@
 """All tool definitions, schemas, and handlers."""
 import json
+import mmap
+import os
+import re
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from amas_code import checkpoint, config as config_mod, ui
+from amas_code import checkpoint, config as config_mod, file_index, ui
 
 # ── Module state (set by agent before use) ───────────────────────────────────
 _config: dict = {}
@@ -34,6 +38,34 @@ def _schema(name: str, desc: str, props: dict, required: list[str]) -> dict:
     }
 
 
+# ── Atomic writes ────────────────────────────────────────────────────────────
+
+def _atomic_write(path: str | Path, content: str) -> None:
+    """Write text so readers see either the old file or the new one, never a torn write.
+
+    The data goes to a temp file beside the target, is fsynced, then renamed over it.
+    Symlinks are written through and an existing file keeps its permission bits.
+    """
+    target = os.path.realpath(path)
+    tmp = f"{target}.tmp.{os.getpid()}"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp, os.stat(target).st_mode)
+        except FileNotFoundError:
+            pass  # New file: keep the umask default
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
 # ── read_file ────────────────────────────────────────────────────────────────
 
 def read_file(path: str, start_line: int = 1, end_line: int = None) -> str:
@@ -45,23 +77,28 @@ def read_file(path: str, start_line: int = 1, end_line: int = None) -> str:
         if not p.is_file():
             return f"Error: not a file: {path}"
 
-        # Binary file detection
-        try:
-            content = p.read_text(encoding="utf-8")
-        except UnicodeDecodeError:
-            return f"Binary file, cannot display: {path}"
-
-        lines = content.splitlines()
-        total_lines = len(lines)
-        
         start = max(1, start_line)
-        end = min(total_lines, end_line) if end_line else total_lines
-        
-        if start > total_lines:
-            return f"Error: start_line {start} is beyond end of file ({total_lines} lines)"
-            
-        requested_lines = lines[start-1:end]
-        content_subset = "\n".join(requested_lines)
+        content_subset = None
+        if (start > 1 or end_line) and p.stat().st_size >= _MMAP_MIN_BYTES:
+            content_subset = _read_range(p, start, end_line)
+
+        if content_subset is None:
+            # Binary file detection
+            try:
+                content = p.read_text(encoding="utf-8")
+            except UnicodeDecodeError:
+                return f"Binary file, cannot display: {path}"
+
+            lines = content.splitlines()
+            total_lines = len(lines)
+
+            end = min(total_lines, end_line) if end_line else total_lines
+
+            if start > total_lines:
+                return f"Error: start_line {start} is beyond end of file ({total_lines} lines)"
+
+            requested_lines = lines[start-1:end]
+            content_subset = "\n".join(requested_lines)
 
         # Truncate if still too large
         if len(content_subset) > 50_000:
@@ -73,6 +110,52 @@ def read_file(path: str, start_line: int = 1, end_line: int = None) -> str:
         return f"Error reading {path}: {e}"
 
 
+_MMAP_MIN_BYTES = 64 * 1024  # Below this, mapping costs more than decoding the whole file
+_MMAP_CHUNK = 1 << 20
+# Line breaks str.splitlines() honours besides \n (and \r\n); numbering by \n alone would drift past them
+_ODD_BREAKS_RE = re.compile(rb"\r(?!\n)|[\x0b\x0c\x1c-\x1e]|\xc2\x85|\xe2\x80[\xa8\xa9]")
+
+
+def _read_range(p: Path, start: int, end: int | None) -> str | None:
+    """Lines `start`..`end` of a large file via mmap, decoding only that byte range.
+
+    Returns None whenever the full read path must decide instead: likely binary, start
+    past EOF, exotic line breaks before the range, or a range that isn't valid UTF-8.
+    """
+    with open(p, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if b"\0" in mm[:8192]:  # Likely binary: let the full decode report it
+            return None
+        lo = _skip_lines(mm, 0, start - 1)
+        if lo >= len(mm):
+            return None
+        hi = _skip_lines(mm, lo, end - start + 1) if end else len(mm)
+        if hi <= lo:
+            return ""
+        if _ODD_BREAKS_RE.search(mm, 0, hi):
+            return None
+        try:
+            return "\n".join(mm[lo:hi].decode("utf-8").splitlines())
+        except UnicodeDecodeError:
+            return None
+
+
+def _skip_lines(mm: mmap.mmap, pos: int, n: int) -> int:
+    """Offset just past the `n`-th newline at or after `pos` (the file size if there are fewer)."""
+    size = len(mm)
+    while n > 0 and pos < size:
+        chunk = mm[pos:pos + _MMAP_CHUNK]
+        count = chunk.count(b"\n")  # Whole chunks are skipped with one C-level count
+        if count < n:
+            n -= count
+            pos += len(chunk)
+            continue
+        i = -1
+        for _ in range(n):
+            i = chunk.find(b"\n", i + 1)
+        return pos + i + 1
+    return min(pos, size)
+
+
 def _numbered(content: str, start_line: int = 1) -> str:
     """Add line numbers to content starting from start_line."""
     lines = content.splitlines()
@@ -81,6 +164,20 @@ def _numbered(content: str, start_line: int = 1) -> str:
     return "\n".join(f"{i+start_line:>{width}} | {l}" for i, l in enumerate(lines))
 
 
+def _numbered_head(content: str, max_chars: int) -> str:
+    """Like _numbered(content), but stops formatting lines once past `max_chars` (callers truncate)."""
+    lines = content.splitlines()
+    width = len(str(len(lines)))
+    out, size = [], -1
+    for i, l in enumerate(lines, 1):
+        if size > max_chars:
+            break
+        row = f"{i:>{width}} | {l}"
+        out.append(row)
+        size += len(row) + 1
+    return "\n".join(out)
+
+
 TOOLS.append(_schema("read_file", "Read a file and return contents with line numbers. Use start_line/end_line for efficiency on large files.", {
     "path": {"type": "string", "description": "Path to the file to read"},
     "start_line": {"type": "integer", "description": "First line to read (default 1)"},
@@ -104,7 +201,8 @@ def write_file(path: str, content: str) -> str:
 
         checkpoint.save(f"before write {path}")
         p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(content, encoding="utf-8")
+        _atomic_write(p, content)
+        file_index.touch(path)
         checkpoint.save(f"write {path}")
         return f"Wrote {len(content)} bytes to {path}"
     except Exception as e:
@@ -134,7 +232,8 @@ def create_file(path: str, content: str = "") -> str:
 
         checkpoint.save(f"before create {path}")
         p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(content, encoding="utf-8")
+        _atomic_write(p, content)
+        file_index.touch(path)
         checkpoint.save(f"create {path}")
         return f"Created {path} ({len(content)} bytes)"
     except Exception as e:
@@ -160,10 +259,10 @@ def edit_file(path: str, old_str: str, new_str: str, occurrence: int = 1) -> str
             return f"Error: file not found: {path}"
 
         content = p.read_text(encoding="utf-8")
-        count = content.count(old_str)
-        
-        if count == 0:
-            snippet = _numbered(content)
+        first = content.find(old_str)
+
+        if first < 0:
+            snippet = _numbered_head(content, 4000)
             if len(snippet) > 4000:
                 snippet = snippet[:4000] + "\n[truncated — file has more content]"
             return f"Error: string not found in {path}. Current file content:\n{snippet}"
@@ -172,19 +271,23 @@ def edit_file(path: str, old_str: str, new_str: str, occurrence: int = 1) -> str
             # Replace all
             new_content = content.replace(old_str, new_str)
         else:
-            if occurrence > count:
-                return f"Error: string appears {count} times, but occurrence {occurrence} was requested."
-            if count > 1 and occurrence == 1 and _config.get("require_unique_edit", True):
-                 # Keep existing safe behavior by default if not specified otherwise
-                 return f"Error: string appears {count} times. Be more specific or use 'occurrence' (1-{count}, or 0 for all)."
-            
-            # Replace Nth occurrence
-            parts = content.split(old_str)
-            # parts has count+1 elements. We want to join parts[0:occurrence] with old_str, 
-            # then add new_str, then join the rest with old_str.
-            prefix = old_str.join(parts[:occurrence])
-            suffix = old_str.join(parts[occurrence:])
-            new_content = prefix + new_str + suffix
+            step = len(old_str)  # Matches don't overlap, same as str.count/str.replace
+            target = occurrence
+            if occurrence < 0:  # Counted from the end, as the old split-based version allowed
+                target += content.count(old_str) + 1
+            elif occurrence == 1 and _config.get("require_unique_edit", True) and content.find(old_str, first + step) >= 0:
+                # Keep existing safe behavior by default if not specified otherwise
+                count = content.count(old_str)
+                return f"Error: string appears {count} times. Be more specific or use 'occurrence' (1-{count}, or 0 for all)."
+
+            # Find the Nth occurrence; the full count is only needed for the error
+            pos, seen = first, 1
+            while seen < target and pos >= 0:
+                pos = content.find(old_str, pos + step)
+                seen += 1
+            if target < 1 or pos < 0:
+                return f"Error: string appears {content.count(old_str)} times, but occurrence {occurrence} was requested."
+            new_content = content[:pos] + new_str + content[pos + step:]
 
         ui.show_diff(content, new_content, path)
 
@@ -192,7 +295,8 @@ def edit_file(path: str, old_str: str, new_str: str, occurrence: int = 1) -> str
             return "Edit declined by user."
 
         checkpoint.save(f"before edit {path}")
-        p.write_text(new_content, encoding="utf-8")
+        _atomic_write(p, new_content)
+        file_index.touch(path)
         checkpoint.save(f"edit {path}")
         return f"Edited {path} successfully ({'all' if occurrence == 0 else 'occurrence ' + str(occurrence)} replaced)."
     except Exception as e:
@@ -222,6 +326,7 @@ def delete_file(path: str) -> str:
 
         checkpoint.save(f"before delete {path}")
         p.unlink()
+        file_index.touch(path)
         checkpoint.save(f"delete {path}")
         return f"Deleted {path}"
     except Exception as e:
@@ -405,9 +510,10 @@ def list_files(path: str = ".", max_depth: int = 3) -> str:
         if not root.exists():
             return f"Error: path not found: {path}"
 
-        ignore = set(_config.get("ignore", ["node_modules", "__pycache__", ".git", "*.pyc", "dist", "build", ".venv"]))
+        ignore = _config.get("ignore", ["node_modules", "__pycache__", ".git", "*.pyc", "dist", "build", ".venv"])
+        rules = config_mod.compile_ignore(tuple(sorted(set(ignore))))  # Cached per ignore list
         lines = []
-        _walk_tree(root, "", lines, ignore, max_depth, 0)
+        _walk_tree(str(root), "", lines, rules, max_depth, 0)
 
         if not lines:
             return f"Empty directory: {path}"
@@ -417,18 +523,20 @@ def list_files(path: str = ".", max_depth: int = 3) -> str:
         return f"Error listing {path}: {e}"
 
 
-def _walk_tree(p: Path, prefix: str, lines: list, ignore: set, max_depth: int, depth: int) -> None:
+def _walk_tree(path: str, prefix: str, lines: list, rules: tuple, max_depth: int, depth: int) -> None:
     """Recursively build file tree lines."""
     if depth > max_depth:
         lines.append(f"{prefix}...")
         return
 
+    exact, glob_re = rules
     try:
-        entries = sorted(p.iterdir(), key=lambda x: (not x.is_dir(), x.name))
+        # DirEntry caches is_dir() and stat(), so each entry costs at most one syscall
+        with os.scandir(path) as it:
+            entries = [e for e in it if e.name not in exact and not (glob_re and glob_re.match(e.name))]
     except PermissionError:
         return
-
-    entries = [e for e in entries if e.name not in ignore and not any(e.match(ig) for ig in ignore)]
+    entries.sort(key=lambda e: (not e.is_dir(), e.name))
 
     for i, entry in enumerate(entries):
         is_last = i == len(entries) - 1
@@ -436,7 +544,7 @@ def _walk_tree(p: Path, prefix: str, lines: list, ignore: set, max_depth: int, d
         if entry.is_dir():
             lines.append(f"{prefix}{connector}📁 {entry.name}/")
             ext = "    " if is_last else "│   "
-            _walk_tree(entry, prefix + ext, lines, ignore, max_depth, depth + 1)
+            _walk_tree(entry.path, prefix + ext, lines, rules, max_depth, depth + 1)
         else:
             size = entry.stat().st_size
             size_str = _human_size(size)
@@ -474,20 +582,18 @@ def count_loc(path: str = ".", file_extension: str = "") -> str:
         if p.is_file():
             if file_extension and not p.name.endswith(file_extension):
                 return f"File {path} does not match extension {file_extension}"
-            with open(p, 'r', encoding='utf-8', errors='ignore') as f:
-                total_lines = len(f.readlines())
+            total_lines = _count_lines(p)
             file_count = 1
         elif p.is_dir():
-            import os
             ignore = set(_config.get("ignore", ["node_modules", "__pycache__", ".git", ".venv", "dist", "build"]))
+            paths = []
             for root, dirs, files in os.walk(p):
                 dirs[:] = [d for d in dirs if d not in ignore and not d.startswith(".")]
-                for file in files:
-                    file_path = Path(root) / file
-                    if not file_extension or file_path.name.endswith(file_extension):
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            total_lines += len(f.readlines())
-                        file_count += 1
+                paths.extend(os.path.join(root, f) for f in files if not file_extension or f.endswith(file_extension))
+            # Reads and bytes.count release the GIL, so files are counted in parallel
+            with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as ex:
+                total_lines = sum(ex.map(_count_lines, paths))
+            file_count = len(paths)
         else:
             return f"Error: path is neither a file nor a directory: {path}"
 
@@ -499,6 +605,22 @@ def count_loc(path: str = ".", file_extension: str = "") -> str:
         return f"Error counting lines of code in {path}: {e}"
 
 
+def _count_lines(path) -> int:
+    """Line count as text-mode readlines() gives it (LF, CRLF and a lone CR each end a line).
+
+    Counted over 1 MB binary chunks, so no file is decoded or split into a list of lines.
+    Only invalid UTF-8 (i.e. binary files) can count differently from a decoded read.
+    """
+    breaks = crlf = 0
+    last = b""
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            breaks += chunk.count(b"\n") + chunk.count(b"\r")
+            crlf += chunk.count(b"\r\n") + (last == b"\r" and chunk[:1] == b"\n")
+            last = chunk[-1:]
+    return breaks - crlf + (last not in (b"", b"\n", b"\r"))  # Unterminated last line
+
+
 TOOLS.append(_schema("count_loc", "Counts lines of code in a file or directory, optionally filtered by extension.", {
     "path": {"type": "string", "description": "Path to the file or directory (default: current directory)"},
     "file_extension": {"type": "string", "description": "Optional file extension to filter by (e.g., '.py')"},
@@ -515,7 +637,8 @@ def replace_lines(path: str, start_line: int, end_line: int, content: str) -> st
         if not p.exists():
             return f"Error: file not found: {path}"
 
-        lines = p.read_text(encoding="utf-8").splitlines()
+        text = p.read_text(encoding="utf-8")
+        lines = text.splitlines()
         if start_line < 1 or start_line > len(lines):
             return f"Error: start_line {start_line} out of range (1-{len(lines)})"
         if end_line < start_line or end_line > len(lines):
@@ -523,7 +646,7 @@ def replace_lines(path: str, start_line: int, end_line: int, content: str) -> st
 
         new_lines = lines[:start_line-1] + content.splitlines() + lines[end_line:]
         new_content = "\n".join(new_lines)
-        if p.read_text(encoding="utf-8").endswith('\n') and not new_content.endswith('\n'):
+        if text.endswith('\n') and not new_content.endswith('\n'):
             new_content += '\n'
 
         ui.show_diff("\n".join(lines), new_content, path)
@@ -531,7 +654,8 @@ def replace_lines(path: str, start_line: int, end_line: int, content: str) -> st
             return "Edit declined by user."
 
         checkpoint.save(f"before replace_lines {path}")
-        p.write_text(new_content, encoding="utf-8")
+        _atomic_write(p, new_content)
+        file_index.touch(path)
         checkpoint.save(f"replace_lines {path}")
         return f"Replaced lines {start_line}-{end_line} in {path}."
     except Exception as e:
@@ -4,6 +4,9 @@ import subprocess
 import shlex
 import time
 import threading
+from collections import Counter
+from itertools import islice
+from operator import itemgetter
 
 from rich.console import Console, Group
 from rich.markdown import Markdown
@@ -278,12 +281,12 @@ def show_diff(old: str, new: str, filename: str) -> None:
     """Show unified diff with syntax highlighting."""
     old_lines = old.splitlines(keepends=True)
     new_lines = new.splitlines(keepends=True)
-    diff = difflib.unified_diff(old_lines, new_lines, fromfile=f"a/{filename}", tofile=f"b/{filename}")
-    diff_text = "".join(diff)
-    if diff_text:
-        # Count additions and deletions
-        additions = sum(1 for line in diff_text.splitlines() if line.startswith('+') and not line.startswith('+++'))
-        deletions = sum(1 for line in diff_text.splitlines() if line.startswith('-') and not line.startswith('---'))
+    diff = list(difflib.unified_diff(old_lines, new_lines, fromfile=f"a/{filename}", tofile=f"b/{filename}"))
+    if diff:
+        # Tally first characters in C, skipping the ---/+++ file header
+        marks = Counter(map(itemgetter(0), islice(diff, 2, None)))
+        additions, deletions = marks["+"], marks["-"]
+        diff_text = "".join(diff)
 
         subtitle = f"[{SUCCESS}]+{additions}[/] [{ERROR}]-{deletions}[/]"
 
@@ -418,6 +421,14 @@ def show_summary(actions: list[dict]) -> None:
 
 # ── Welcome / help ───────────────────────────────────────────────────────────
 
+def clear_screen() -> None:
+    """Clear the terminal in-process instead of spawning `clear`/`cls`."""
+    console.clear()  # ESC[2J ESC[H, or the win32 console API on legacy Windows terminals
+    if console.is_terminal and not console.legacy_windows:
+        console.file.write("\x1b[3J")  # Drop scrollback too, like `clear` does
+        console.file.flush()
+
+
 def show_welcome() -> None:
     """Show a stunning welcome banner."""
     # Gradient-effect logo using multiple colors
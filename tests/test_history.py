@@ -0,0 +1,74 @@
+"""Round-trip tests for chat session storage."""
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from amas_code import history
+from amas_code.history import ChatSession
+
+
+class SessionStorageTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(history, "CHATS_DIR", Path(tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _session(self, n: int) -> ChatSession:
+        session = ChatSession("s1")
+        for i in range(n):
+            session.add_message("user", f"message {i}")
+        return session
+
+    def test_failed_background_write_is_retried(self):
+        session = self._session(3)
+        write = history._write
+        calls = []
+
+        def fail_once(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise OSError(28, "No space left on device")
+            write(*args)
+
+        with mock.patch.object(history, "_write", fail_once), mock.patch.object(history.ui, "warning"):
+            session.save_later()
+            history.flush()
+            session.add_message("user", "message 3")
+            session.save_later()
+            history.flush()
+
+        loaded = ChatSession.load("s1")
+        self.assertEqual([m["content"] for m in loaded.messages], [f"message {i}" for i in range(4)])
+        self.assertEqual(calls[1][2], 0)  # The write after a failure rewrites the whole session
+
+    def test_failed_append_leaves_file_appendable(self):
+        session = self._session(2)
+        session.save()
+        session.add_message("user", "message 2")
+        with mock.patch.object(history, "_dumps", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                session.save()  # Messages were appended, then the header write failed
+        session.add_message("user", "message 3")
+        session.save()
+
+        loaded = ChatSession.load("s1")
+        self.assertEqual([m["content"] for m in loaded.messages], [f"message {i}" for i in range(4)])
+
+    @unittest.skipIf(history.zstandard is None, "zstandard not installed")
+    def test_corrupt_tail_keeps_earlier_messages(self):
+        session = self._session(2)
+        session.save()
+        session.add_message("user", "message 2")
+        session.save()
+        path = history.CHATS_DIR / "s1" / "messages.jsonl.zst"
+        path.write_bytes(path.read_bytes() + b"not a zstd frame")
+
+        loaded = ChatSession.load("s1")
+        self.assertEqual([m["content"] for m in loaded.messages], [f"message {i}" for i in range(3)])
+
+
+if __name__ == "__main__":
+    unittest.main()